@@ -13,6 +13,7 @@
 - YouTubeShortsDownloader: shorts YouTube
 """
 from pathlib import Path
+import os
 import sys
 
 # Добавляем src в путь
@@ -213,12 +214,14 @@ def main():
     # Показываем статистику
     downloads_dir = Path('downloads')
     if downloads_dir.exists():
-        folders = list(downloads_dir.iterdir())
-        if folders:
-            print(f"📁 Всего папок: {len(folders)}")
+        # Для подсчета нужны только имена - без Path на каждую запись
+        with os.scandir(downloads_dir) as entries:
+            names = [entry.name for entry in entries]
+        if names:
+            print(f"📁 Всего папок: {len(names)}")
             
-            youtube_count = sum(1 for f in folders if f.name.startswith('youtube_'))
-            instagram_count = sum(1 for f in folders if f.name.startswith('instagram_'))
+            youtube_count = sum(1 for name in names if name.startswith('youtube_'))
+            instagram_count = sum(1 for name in names if name.startswith('instagram_'))
             
             print(f"🎬 YouTube: {youtube_count}")
             print(f"📸 Instagram: {instagram_count}")
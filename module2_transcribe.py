@@ -5,15 +5,95 @@
 Проходит по папкам с контентом и создает транскрибации для видео/аудио файлов,
 у которых еще нет файла транскрипции.
 """
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from pathlib import Path
 from typing import List, Optional
+import io
+import os
 import sys
+import threading
+import time
+import traceback
 
 # Добавляем src в путь
 sys.path.insert(0, str(Path(__file__).parent))
 
 from src.modules.local_ears import LocalEars
 
+# Потоки CPU для Whisper на весь процесс (как у LocalEars по умолчанию)
+WHISPER_THREADS = 16
+
+# Один экземпляр LocalEars на процесс: модель Whisper грузится один раз
+_EARS_SINGLETON: Optional[LocalEars] = None
+
+
+def _get_ears(workers: int = 1) -> LocalEars:
+    """
+    Возвращает общий экземпляр LocalEars (создается при первом вызове)
+    
+    Args:
+        workers: Сколько transcribe() модель выполняет параллельно;
+                 потоки CPU делятся между ними
+    """
+    global _EARS_SINGLETON
+    if _EARS_SINGLETON is None:
+        _EARS_SINGLETON = LocalEars(
+            num_threads=max(1, WHISPER_THREADS // workers),
+            num_workers=workers
+        )
+    return _EARS_SINGLETON
+
+
+class _FolderLogPrefix:
+    """
+    Замена sys.stdout на время параллельной обработки папок
+    
+    Вывод печатается сразу, построчно; каждая строка помечается
+    номером папки, которую обрабатывает поток ([3/12]), поэтому строки
+    разных папок можно различить, а прогресс Whisper виден по ходу работы.
+    """
+    
+    def __init__(self, stream) -> None:
+        self.stream = stream
+        self._local = threading.local()
+        self._lock = threading.Lock()
+    
+    def start(self, prefix: str) -> None:
+        """Начинает помечать строки текущего потока меткой prefix"""
+        self._local.prefix = prefix
+        self._local.partial = ''
+    
+    def finish(self) -> None:
+        """Печатает незавершенную строку и снимает метку текущего потока"""
+        partial = getattr(self._local, 'partial', '')
+        prefix = getattr(self._local, 'prefix', None)
+        self._local.prefix = None
+        self._local.partial = ''
+        if partial:
+            with self._lock:
+                self.stream.write(f"{prefix} {partial}\n")
+    
+    def write(self, text: str) -> int:
+        prefix = getattr(self._local, 'prefix', None)
+        if prefix is None:
+            with self._lock:
+                return self.stream.write(text)
+        
+        # Печатаются только целые строки, хвост ждет следующей записи
+        lines = (self._local.partial + text).splitlines(keepends=True)
+        self._local.partial = lines.pop() if lines and not lines[-1].endswith(('\n', '\r')) else ''
+        if lines:
+            with self._lock:
+                self.stream.write(''.join(f"{prefix} {line}" for line in lines))
+        return len(text)
+    
+    def flush(self) -> None:
+        self.stream.flush()
+    
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
 
 class TranscriptionProcessor:
     """
@@ -23,18 +103,25 @@ class TranscriptionProcessor:
     создает транскрипцию с таймингами и сохраняет в Markdown.
     """
     
-    def __init__(self, content_dir: Path = Path("downloads")):
+    def __init__(self, content_dir: Path = Path("downloads"), jobs: Optional[int] = None):
         """
         Args:
             content_dir: Директория с папками контента
+            jobs: Сколько папок обрабатывать параллельно
+                  (по умолчанию min(4, CPU))
         """
         self.content_dir = Path(content_dir)
-        self.ears = LocalEars()
+        workers = max(1, jobs if jobs is not None else min(4, os.cpu_count() or 1))
+        self.ears = _get_ears(workers)
+        # Больше потоков, чем воркеров модели, только ждали бы в очереди CTranslate2
+        self.jobs = min(workers, self.ears.num_workers)
+        # Дата запуска для frontmatter (одна на весь прогон)
+        self.run_date = datetime.now().strftime('%Y-%m-%d')
         
         # Поддерживаемые форматы
-        self.video_extensions = ['.mp4', '.mov', '.avi', '.mkv', '.webm']
-        self.audio_extensions = ['.mp3', '.m4a', '.wav', '.flac', '.ogg']
-        self.media_extensions = self.video_extensions + self.audio_extensions
+        self.video_extensions = frozenset({'.mp4', '.mov', '.avi', '.mkv', '.webm'})
+        self.audio_extensions = frozenset({'.mp3', '.m4a', '.wav', '.flac', '.ogg'})
+        self.media_extensions = self.video_extensions | self.audio_extensions
     
     def find_content_folders(self) -> List[Path]:
         """
@@ -48,12 +135,8 @@ class TranscriptionProcessor:
             return []
         
         # Сканируем ВСЕ папки в downloads (не только instagram/youtube)
-        folders = []
-        for item in self.content_dir.iterdir():
-            if item.is_dir():
-                folders.append(item)
-        
-        return sorted(folders)
+        with os.scandir(self.content_dir) as entries:
+            return sorted(Path(entry.path) for entry in entries if entry.is_dir())
     
     def find_media_files(self, folder: Path) -> List[Path]:
         """
@@ -65,11 +148,11 @@ class TranscriptionProcessor:
         Returns:
             Список путей к медиа файлам
         """
-        media_files = []
-        for file in folder.iterdir():
-            if file.is_file() and file.suffix.lower() in self.media_extensions:
-                media_files.append(file)
-        return sorted(media_files)
+        with os.scandir(folder) as entries:
+            return sorted(
+                Path(entry.path) for entry in entries
+                if entry.is_file() and os.path.splitext(entry.name)[1].lower() in self.media_extensions
+            )
     
     def has_transcript(self, folder: Path) -> bool:
         """
@@ -110,12 +193,10 @@ class TranscriptionProcessor:
             print(f"⏳ Запуск Whisper (модель: {self.ears.model_size})...")
             print(f"   Это может занять несколько минут...")
             
-            import time
             start_time = time.time()
             
             transcript = self.ears.transcribe(media_file)
             
-            elapsed_time = time.time() - start_time
             elapsed_time = time.time() - start_time
             
             if not transcript:
@@ -133,34 +214,38 @@ class TranscriptionProcessor:
             print(f"\n📝 Сохранение в Markdown...")
             
             # Формируем Markdown с YAML frontmatter
-            from datetime import datetime
-            
-            markdown = "---\n"
-            markdown += f"title: Транскрипция {media_file.stem}\n"
-            markdown += f"date: {datetime.now().strftime('%Y-%m-%d')}\n"
-            markdown += f"media_file: {media_file.name}\n"
-            markdown += f"whisper_model: {self.ears.model_size}\n"
-            markdown += f"language: {transcript.language}\n"
-            markdown += f"duration: {transcript.duration:.1f}\n"
-            markdown += f"type: transcript\n"
-            markdown += "---\n\n"
+            duration = f"{transcript.duration:.1f}"
             
-            markdown += f"# Транскрипция\n\n"
-            markdown += f"**Файл**: `{media_file.name}`\n"
-            markdown += f"**Модель**: `{self.ears.model_size}`\n"
-            markdown += f"**Язык**: `{transcript.language}`\n"
-            markdown += f"**Длительность**: `{transcript.duration:.1f}` секунд\n\n"
-            markdown += "---\n\n"
-            
-            # Добавляем транскрипт с таймингами
-            markdown += transcript.timed_transcript
-            markdown += "\n\n---\n\n"
-            markdown += "## Полный текст (без таймингов)\n\n"
-            markdown += transcript.full_text
-            markdown += "\n"
+            parts = [
+                "---\n",
+                f"title: Транскрипция {media_file.stem}\n",
+                f"date: {self.run_date}\n",
+                f"media_file: {media_file.name}\n",
+                f"whisper_model: {self.ears.model_size}\n",
+                f"language: {transcript.language}\n",
+                f"duration: {duration}\n",
+                "type: transcript\n",
+                "---\n\n",
+                
+                "# Транскрипция\n\n",
+                f"**Файл**: `{media_file.name}`\n",
+                f"**Модель**: `{self.ears.model_size}`\n",
+                f"**Язык**: `{transcript.language}`\n",
+                f"**Длительность**: `{duration}` секунд\n\n",
+                "---\n\n",
+                
+                # Транскрипт с таймингами
+                transcript.timed_transcript,
+                "\n\n---\n\n",
+                "## Полный текст (без таймингов)\n\n",
+                transcript.full_text,
+                "\n",
+            ]
             
-            # Сохраняем
-            transcript_file.write_text(markdown, encoding='utf-8')
+            # Сохраняем: части пишутся в буферизованный файл по очереди,
+            # без сборки еще одной полной копии транскрипта в памяти
+            with transcript_file.open('w', encoding='utf-8', buffering=1 << 20) as out:
+                out.writelines(parts)
             
             print(f"✅ Сохранено: transcript.md ({transcript_file.stat().st_size / 1024:.1f} KB)")
             print(f"{'='*70}")
@@ -174,7 +259,6 @@ class TranscriptionProcessor:
             print(f"❌ ОШИБКА ТРАНСКРИБАЦИИ")
             print(f"{'='*70}")
             print(f"Ошибка: {e}")
-            import traceback
             traceback.print_exc()
             print(f"{'='*70}\n")
             return None
@@ -258,7 +342,8 @@ class TranscriptionProcessor:
             
         # 2. Если нет медиа, проверяем подпапки (рекурсия)
         try:
-            subfolders = [f for f in folder.iterdir() if f.is_dir()]
+            with os.scandir(folder) as entries:
+                subfolders = sorted(Path(entry.path) for entry in entries if entry.is_dir())
         except Exception:
             subfolders = []
             
@@ -277,6 +362,7 @@ class TranscriptionProcessor:
             'folder': folder.name,
             'processed_count': 0,
             'success_count': 0,
+            'is_container': True,
             'success': False,
             'already_has_transcript': False,
             'no_media': False,
@@ -315,7 +401,7 @@ class TranscriptionProcessor:
         print("="*70)
         print(f"📁 Директория: {self.content_dir}")
         print(f"🤖 Модель Whisper: {self.ears.model_size}")
-        print(f"⏱️  Время запуска: {__import__('datetime').datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        print(f"⏱️  Время запуска: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         print("="*70)
         
         # Находим папки
@@ -336,18 +422,55 @@ class TranscriptionProcessor:
             'no_media': 0,
             'successfully_transcribed': 0,
             'errors': 0,
-            'start_time': __import__('time').time()
+            'start_time': time.time()
         }
         
-        # Обрабатываем каждую папку
-        for i, folder in enumerate(folders, 1):
-            print(f"\n{'='*70}")
-            print(f"📂 ПАПКА [{i}/{len(folders)}]")
-            print(f"{'='*70}")
-            print(f"📌 {folder.name[:80]}")
-            print(f"{'='*70}")
-            
-            stats = self.process_folder(folder)
+        # Состояние папок после обработки (для итогового отчета без повторного сканирования)
+        folder_state = {}
+        
+        # При параллельной обработке строки помечаются номером папки
+        log = _FolderLogPrefix(sys.stdout) if self.jobs > 1 else None
+        
+        def run(item):
+            i, folder = item
+            if log:
+                log.start(f"[{i}/{len(folders)}]")
+            try:
+                print(
+                    f"\n{'='*70}\n"
+                    f"📂 ПАПКА [{i}/{len(folders)}]\n"
+                    f"{'='*70}\n"
+                    f"📌 {folder.name[:80]}\n"
+                    f"{'='*70}"
+                )
+                return self.process_folder(folder)
+            finally:
+                if log:
+                    log.finish()
+        
+        # Обрабатываем папки: декодирование аудио одной папки перекрывается
+        # с инференсом Whisper для другой (faster-whisper отпускает GIL,
+        # модель создана с num_workers=jobs)
+        if log:
+            sys.stdout = log
+        try:
+            with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+                results = executor.map(run, enumerate(folders, 1))
+                stats_by_folder = list(zip(folders, results))
+        finally:
+            if log:
+                sys.stdout = log.stream
+        
+        for i, (folder, stats) in enumerate(stats_by_folder, 1):
+            if not stats.get('is_container'):
+                has_media = not stats['no_media']
+                folder_state[folder] = {
+                    'has_transcript': (
+                        stats['already_has_transcript'] or stats['success']
+                        or (not has_media and self.has_transcript(folder))
+                    ),
+                    'has_media': has_media,
+                }
             
             if stats['already_has_transcript']:
                 total_stats['already_has_transcript'] += 1
@@ -361,7 +484,7 @@ class TranscriptionProcessor:
                 print(f"\n❌ [{i}/{len(folders)}] Ошибка обработки")
         
         # Вычисляем время
-        elapsed_time = __import__('time').time() - total_stats['start_time']
+        elapsed_time = time.time() - total_stats['start_time']
         hours = int(elapsed_time // 3600)
         minutes = int((elapsed_time % 3600) // 60)
         seconds = int(elapsed_time % 60)
@@ -396,19 +519,11 @@ class TranscriptionProcessor:
             pending_transcribe = 0
             pending_ai = 0
             
-            for folder in folders:
-                has_transcript = (folder / "transcript.md").exists()
-                has_analysis = (folder / "Knowledge.md").exists()  # Модуль 3 создает Knowledge.md
-                
-                # Проверяем наличие медиа файлов (видео + аудио)
-                media_files = [
-                    f for f in folder.iterdir() 
-                    if f.is_file() and f.suffix.lower() in self.media_extensions
-                ]
-                
-                if media_files and not has_transcript:
+            for folder, state in folder_state.items():
+                if state['has_media'] and not state['has_transcript']:
                     pending_transcribe += 1
-                elif has_transcript and not has_analysis:
+                elif state['has_transcript'] and not (folder / "Knowledge.md").exists():
+                    # Модуль 3 создает Knowledge.md
                     pending_ai += 1
             
             if pending_transcribe > 0 or pending_ai > 0:
@@ -439,10 +554,18 @@ def main():
         type=str,
         help='Обработать только одну папку (имя папки)'
     )
+    parser.add_argument(
+        '--jobs',
+        type=int,
+        default=None,
+        help='Количество папок, обрабатываемых параллельно; модель Whisper '
+             'создается с таким числом воркеров, потоки CPU делятся между ними '
+             '(по умолчанию: min(4, CPU))'
+    )
     
     args = parser.parse_args()
     
-    processor = TranscriptionProcessor(content_dir=args.dir)
+    processor = TranscriptionProcessor(content_dir=args.dir, jobs=args.jobs)
     
     if args.folder:
         # Обработка одной папки
@@ -6,8 +6,13 @@
 Создает теги, саммари и сохраняет в Obsidian-совместимый Markdown.
 """
 from pathlib import Path
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Tuple
+import asyncio
+import json
+import os
 import sys
+import traceback
+from dataclasses import dataclass
 from datetime import datetime
 
 # Добавляем src в путь
@@ -15,7 +20,47 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from src.modules.local_brain import LocalBrain
 from src.modules.tag_manager import TagManager
-import threading
+from src.modules.llm_cache import LLMCache
+from concurrent.futures import ThreadPoolExecutor
+
+# Состояние последней обработки папки (mtime входных файлов и модель)
+_STATE_FILE_NAME = '.secbrain_state.json'
+# Входные файлы, изменение которых требует повторного анализа
+_INPUT_FILE_NAMES = ('description.md', 'transcript.md')
+
+try:
+    # get_rag_engine: общий RAGEngine на папку пользователя (база и модель открываются один раз)
+    from src.modules.module4_rag import RAGEngine, get_rag_engine as _get_rag
+except ImportError:
+    # module4 не установлен — индексирование пропускаем
+    RAGEngine = None
+
+
+@dataclass(slots=True)
+class FolderMeta:
+    """Данные из имени папки контента (формат: источник_ID_название)"""
+    source: str
+    id: str
+    title: str
+    
+    @classmethod
+    def from_name(cls, name: str) -> "FolderMeta":
+        """
+        Разбирает имя папки одним split
+        
+        Args:
+            name: Имя папки
+            
+        Returns:
+            FolderMeta (недостающие части - 'unknown', название - все имя)
+        """
+        parts = name.split('_', 2)
+        title = parts[2] if len(parts) > 2 else name
+        return cls(
+            source=parts[0],
+            id=parts[1] if len(parts) > 1 else 'unknown',
+            title=title.replace('_', ' ')
+        )
 
 
 class AIProcessor:
@@ -30,20 +75,45 @@ class AIProcessor:
         self,
         content_dir: Path = Path("downloads"),
         tags_file: Path = Path("known_tags.json"),
-        model: str = "qwen2.5:7b"
+        model: str = "qwen2.5:7b",
+        use_cache: bool = True,
+        cache_file: Optional[Path] = None,
+        verbose: bool = False
     ):
         """
         Args:
             content_dir: Директория с папками контента
             tags_file: Файл с базой тегов
             model: Модель Ollama для анализа
+            use_cache: Использовать кэш ответов LLM
+            cache_file: Путь к кэшу (по умолчанию ~/.secbrain/llm_cache.sqlite)
+            verbose: Печатать полный traceback при ошибках анализа
         """
         self.content_dir = Path(content_dir)
         self.brain = LocalBrain(model=model)
         self.tag_manager = TagManager(tags_file)  # Передаём путь напрямую
+        self.llm_cache = LLMCache(cache_file) if use_cache else None
+        self._verbose = verbose
+        
+        # Ограниченный пул для фоновой RAG индексации (вместо потока на каждую заметку)
+        self._rag_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="rag-index")
+        # Папки, ожидающие пакетной индексации {user_root: [папки]} (только в process_all)
+        self._pending_index: Optional[Dict[str, List[Path]]] = None
+        
+        # Результаты LLM, полученные заранее параллельными запросами (process_all)
+        self._prefetched_summaries: Dict[Path, Dict] = {}
+        
+        # Содержимое уже прочитанных каталогов {папка: {имя: DirEntry}} (только в process_all)
+        self._tree_cache: Optional[Dict[Path, Dict[str, os.DirEntry]]] = None
+        # Строка известных тегов для промпта (только в process_all, обновляется при новых тегах)
+        self._tags_snapshot: Optional[str] = None
         
         # Поддерживаемые форматы изображений
-        self.image_extensions = ['.jpg', '.jpeg', '.png', '.webp', '.gif']
+        self.image_extensions = frozenset({'.jpg', '.jpeg', '.png', '.webp', '.gif'})
+        # Видео/аудио требуют транскрибации (Модуль 2) перед анализом
+        self.video_audio_extensions = frozenset({
+            '.mp4', '.mov', '.avi', '.mkv', '.webm', '.mp3', '.m4a', '.wav', '.flac', '.ogg'
+        })
     
     def find_content_folders(self) -> List[Path]:
         """
@@ -57,122 +127,230 @@ class AIProcessor:
             return []
         
         # Сканируем ВСЕ папки в downloads (не только instagram/youtube)
-        folders = []
-        for item in self.content_dir.iterdir():
-            if item.is_dir():
-                folders.append(item)
+        entries = self._scan(self.content_dir)
+        folders = [Path(entry.path) for entry in entries.values() if entry.is_dir()]
         
         return sorted(folders)
     
-    def has_analysis(self, folder: Path) -> bool:
+    def _scan(self, folder: Path) -> Dict[str, os.DirEntry]:
+        """
+        Читает содержимое папки одним вызовом os.scandir
+        
+        Результат передается во все проверки папки, чтобы не обходить
+        один и тот же каталог несколько раз. Во время process_all
+        результат запоминается в _tree_cache: дерево downloads читается
+        один раз за запуск (предзагрузка LLM и основной проход
+        используют одни и те же списки).
+        
+        Args:
+            folder: Папка для сканирования
+            
+        Returns:
+            Словарь {имя: DirEntry}
+        """
+        if self._tree_cache is not None and folder in self._tree_cache:
+            return self._tree_cache[folder]
+        
+        with os.scandir(folder) as it:
+            entries = {entry.name: entry for entry in it}
+        
+        if self._tree_cache is not None:
+            self._tree_cache[folder] = entries
+        return entries
+    
+    def has_analysis(self, folder: Path, entries: Optional[Dict[str, os.DirEntry]] = None) -> bool:
         """
         Проверяет, есть ли уже AI анализ
         
         Args:
             folder: Папка для проверки
+            entries: Результат _scan(folder), если уже получен
             
         Returns:
             True если Knowledge.md существует
         """
-        note_file = folder / "Knowledge.md"
-        return note_file.exists()
+        if entries is not None:
+            return "Knowledge.md" in entries
+        try:
+            (folder / "Knowledge.md").stat()
+            return True
+        except FileNotFoundError:
+            return False
+    
+    def _inputs_mtime(self, folder: Path, entries: Optional[Dict[str, os.DirEntry]] = None) -> int:
+        """
+        Максимальный mtime (нс) входных файлов папки (description.md, transcript.md)
+        
+        Args:
+            folder: Папка с контентом
+            entries: Результат _scan(folder), если уже получен
+            
+        Returns:
+            mtime в наносекундах или 0, если входных файлов нет
+        """
+        mtimes = [0]
+        for name in _INPUT_FILE_NAMES:
+            try:
+                if entries is not None:
+                    if name not in entries:
+                        continue
+                    mtimes.append(entries[name].stat().st_mtime_ns)
+                else:
+                    mtimes.append(os.stat(folder / name).st_mtime_ns)
+            except FileNotFoundError:
+                continue
+        return max(mtimes)
+    
+    def _is_up_to_date(self, folder: Path, entries: Optional[Dict[str, os.DirEntry]] = None) -> bool:
+        """
+        Проверяет, что Knowledge.md построен по текущим входным файлам и модели
+        
+        Заметки без файла состояния (созданные до его появления) считаются актуальными.
+        
+        Args:
+            folder: Папка с Knowledge.md
+            entries: Результат _scan(folder), если уже получен
+            
+        Returns:
+            True если повторная обработка не нужна
+        """
+        if entries is not None and _STATE_FILE_NAME not in entries:
+            return True
+        try:
+            state = json.loads((folder / _STATE_FILE_NAME).read_text(encoding='utf-8'))
+        except FileNotFoundError:
+            return True
+        except ValueError:
+            return False
+        
+        return (
+            state.get('mtime_ns') == self._inputs_mtime(folder, entries)
+            and state.get('model') == str(self.brain.model)
+        )
+    
+    def _save_state(self, folder: Path, entries: Optional[Dict[str, os.DirEntry]] = None) -> None:
+        """Сохраняет состояние успешной обработки рядом с Knowledge.md"""
+        state = {'mtime_ns': self._inputs_mtime(folder, entries), 'model': str(self.brain.model)}
+        try:
+            (folder / _STATE_FILE_NAME).write_text(json.dumps(state), encoding='utf-8')
+        except OSError as e:
+            print(f"⚠️  Не удалось сохранить {_STATE_FILE_NAME}: {e}")
     
-    def read_description(self, folder: Path) -> Optional[str]:
+    def _read_text_file(
+        self,
+        folder: Path,
+        name: str,
+        entries: Optional[Dict[str, os.DirEntry]] = None
+    ) -> Optional[str]:
+        """Читает текстовый файл папки или возвращает None, если его нет"""
+        if entries is not None and name not in entries:
+            return None
+        try:
+            return (folder / name).read_text(encoding='utf-8')
+        except FileNotFoundError:
+            return None
+    
+    def read_description(self, folder: Path, entries: Optional[Dict[str, os.DirEntry]] = None) -> Optional[str]:
         """
         Читает описание из description.md
         
         Args:
             folder: Папка с контентом
+            entries: Результат _scan(folder), если уже получен
             
         Returns:
             Текст описания или None
         """
-        desc_file = folder / "description.md"
-        if desc_file.exists():
-            return desc_file.read_text(encoding='utf-8')
-        return None
+        return self._read_text_file(folder, "description.md", entries)
     
-    def read_transcript(self, folder: Path) -> Optional[str]:
+    def read_transcript(self, folder: Path, entries: Optional[Dict[str, os.DirEntry]] = None) -> Optional[str]:
         """
         Читает транскрипцию из transcript.md
         
         Args:
             folder: Папка с контентом
+            entries: Результат _scan(folder), если уже получен
             
         Returns:
             Текст транскрипции или None
         """
-        transcript_file = folder / "transcript.md"
-        if transcript_file.exists():
-            return transcript_file.read_text(encoding='utf-8')
-        return None
+        return self._read_text_file(folder, "transcript.md", entries)
     
-    def find_images(self, folder: Path) -> List[Path]:
+    def find_images(self, folder: Path, entries: Optional[Dict[str, os.DirEntry]] = None) -> List[Path]:
         """
         Находит изображения в папке
         
         Args:
             folder: Папка для поиска
+            entries: Результат _scan(folder), если уже получен
             
         Returns:
             Список путей к изображениям
         """
-        images = []
-        for file in folder.iterdir():
-            if file.is_file() and file.suffix.lower() in self.image_extensions:
-                images.append(file)
-        return sorted(images)
+        if entries is None:
+            entries = self._scan(folder)
+        return sorted(
+            Path(entry.path) for name, entry in entries.items()
+            if entry.is_file() and os.path.splitext(name)[1].lower() in self.image_extensions
+        )
+    
+    def _cache_key(self, description: Optional[str], transcript: Optional[str], known_tags: str) -> str:
+        """Ключ кэша LLM для входных данных папки"""
+        return LLMCache.make_key(str(self.brain.model), description or "", transcript or "", known_tags)
     
-    def analyze_content(self, folder: Path) -> Optional[Dict]:
+    def analyze_content(self, folder: Path, entries: Optional[Dict[str, os.DirEntry]] = None) -> Optional[Dict]:
         """
         Анализирует контент папки
         
         Args:
             folder: Папка для анализа
+            entries: Результат _scan(folder), если уже получен
             
         Returns:
             Словарь с результатами анализа или None
         """
         print(f"\n🧠 AI Анализ: {folder.name}")
         
-        # Собираем данные
-        description = self.read_description(folder)
-        transcript = self.read_transcript(folder)
-        images = self.find_images(folder)
+        # Собираем данные (один обход папки на все проверки)
+        if entries is None:
+            entries = self._scan(folder)
+        description = self.read_description(folder, entries)
+        transcript = self.read_transcript(folder, entries)
+        images = self.find_images(folder, entries)
         
         if not description and not transcript:
             print("⚠️  Нет данных для анализа (нет description.md и transcript.md)")
             return None
         
-        # Формируем контекст для анализа
-        context_parts = []
-        
-        if description:
-            context_parts.append(f"## Описание\n\n{description}")
-        
-        if transcript:
-            context_parts.append(f"## Транскрипция\n\n{transcript}")
-        
-        if images:
-            context_parts.append(f"## Изображения\n\nКоличество: {len(images)}")
-        
-        context = "\n\n".join(context_parts)
-        
         # AI анализ
         try:
             print("   🤖 Запуск AI анализа...")
             
             # Получаем строку с известными тегами
-            known_tags_str = self.tag_manager.get_tags_string()
+            known_tags_str = self._tags_snapshot
+            if known_tags_str is None:
+                known_tags_str = self.tag_manager.get_tags_string()
             
-            # Создаем саммари
-            summary = self.brain.analyze(
-                caption=description or "",
-                transcript=transcript or "",
-                comments=[],  # Комментарии пока не используем
-                author="",     # Автор не всегда известен
-                known_tags=known_tags_str
-            )
+            # Создаем саммари (или берем уже полученное параллельным запросом / из кэша).
+            # prefetch_analyses уже прошел через кэш, поэтому ключ считаем только при промахе
+            if folder in self._prefetched_summaries:
+                summary = self._prefetched_summaries.pop(folder)
+            else:
+                cache_key = self._cache_key(description, transcript, known_tags_str)
+                summary = self.llm_cache.get(cache_key) if self.llm_cache else None
+                
+                if summary is not None:
+                    print("   💾 Ответ взят из кэша LLM")
+                else:
+                    summary = self.brain.analyze(
+                        caption=description or "",
+                        transcript=transcript or "",
+                        comments=[],  # Комментарии пока не используем
+                        author="",     # Автор не всегда известен
+                        known_tags=known_tags_str
+                    )
+                    if summary and self.llm_cache:
+                        self.llm_cache.set(cache_key, summary)
             
             if not summary:
                 print("❌ AI не вернул результат")
@@ -188,6 +366,8 @@ class AIProcessor:
                 new_count = self.tag_manager.add_tags(tags)
                 if new_count > 0:
                     print(f"   ✨ Добавлено новых тегов: {new_count}")
+                    if self._tags_snapshot is not None:
+                        self._tags_snapshot = self.tag_manager.get_tags_string()
                 print(f"   ✅ Теги: {', '.join(tags)}")
             else:
                 print("   ⚠️  Теги не найдены")
@@ -203,8 +383,8 @@ class AIProcessor:
             
         except Exception as e:
             print(f"❌ Ошибка AI анализа: {e}")
-            import traceback
-            traceback.print_exc()
+            if self._verbose:
+                traceback.print_exc()
             return None
     
     def _extract_summary_text(self, summary_data: Dict) -> str:
@@ -261,10 +441,32 @@ class AIProcessor:
         
         return '\n'.join(result_parts) if result_parts else 'Нет саммари'
     
+    def _rag_root(self, folder: Path) -> Path:
+        """
+        Находит корень RAG базы пользователя для папки контента
+        
+        Корень — директория downloads (users/{имя}/downloads или downloads),
+        а не сама папка контента: в именах папок контента всегда есть '_'.
+        
+        Args:
+            folder: Папка контента
+            
+        Returns:
+            content_dir, ближайший предок downloads или родитель папки
+        """
+        if folder.is_relative_to(self.content_dir):
+            return self.content_dir
+        for p in folder.parents:
+            if p.name == 'downloads':
+                return p
+        return folder.parent
+    
     def create_obsidian_note(
         self, 
         folder: Path, 
-        analysis: Dict
+        analysis: Dict,
+        entries: Optional[Dict[str, os.DirEntry]] = None,
+        meta: Optional[FolderMeta] = None
     ) -> Optional[Path]:
         """
         Создает Knowledge.md в формате Obsidian
@@ -272,18 +474,18 @@ class AIProcessor:
         Args:
             folder: Папка для сохранения
             analysis: Результаты анализа
+            entries: Результат _scan(folder), если уже получен
+            meta: Разобранное имя папки, если уже получено
             
         Returns:
             Путь к созданному файлу или None
         """
         note_file = folder / "Knowledge.md"
         
-        # Извлекаем название из имени папки
-        folder_name = folder.name
-        # Формат: источник_ID_название
-        parts = folder_name.split('_', 2)
-        title = parts[2] if len(parts) > 2 else folder_name
-        title = title.replace('_', ' ')
+        # Извлекаем название из имени папки (формат: источник_ID_название)
+        if meta is None:
+            meta = FolderMeta.from_name(folder.name)
+        title = meta.title
         
         # Создаем Obsidian frontmatter
         tags_str = ', '.join(analysis['tags'])
@@ -293,11 +495,11 @@ class AIProcessor:
         summary_text = self._extract_summary_text(summary_data)
         category = summary_data.get('category', 'Не указана') if isinstance(summary_data, dict) else 'Не указана'
         
-        markdown = f"""---
+        header = f"""---
 title: {title}
 date: {datetime.now().strftime('%Y-%m-%d')}
 tags: [{', '.join(f'#{tag}' for tag in analysis['tags'])}]
-source: {parts[0] if len(parts) > 0 else 'unknown'}
+source: {meta.source}
 processed: true
 ---
 
@@ -305,8 +507,8 @@ processed: true
 
 ## 📊 Метаданные
 
-- **Источник**: {parts[0].upper() if len(parts) > 0 else 'UNKNOWN'}
-- **ID**: {parts[1] if len(parts) > 1 else 'unknown'}
+- **Источник**: {meta.source.upper()}
+- **ID**: {meta.id}
 - **Дата обработки**: {datetime.now().strftime('%Y-%m-%d %H:%M')}
 - **Изображений**: {analysis['image_count']}
 - **Транскрипция**: {'✅' if analysis['has_transcript'] else '❌'}
@@ -327,46 +529,48 @@ processed: true
 
 """
         
+        parts = [header]
+        
         # Добавляем ценные комментарии если есть
         if isinstance(analysis['summary'], dict) and analysis['summary'].get('valuable_comments'):
-            for comment in analysis['summary']['valuable_comments']:
-                markdown += f"- {comment}\n"
+            parts.extend(f"- {comment}\n" for comment in analysis['summary']['valuable_comments'])
         else:
-            markdown += "*Нет ценных комментариев*\n"
+            parts.append("*Нет ценных комментариев*\n")
         
-        markdown += "\n## 📎 Связанные файлы\n\n- [[description.md|Описание]]\n"
+        parts.append("\n## 📎 Связанные файлы\n\n- [[description.md|Описание]]\n")
         
         if analysis['has_transcript']:
-            markdown += "- [[transcript.md|Транскрипция]]\n"
+            parts.append("- [[transcript.md|Транскрипция]]\n")
         
         # Добавляем ссылки на изображения
         if analysis['image_count'] > 0:
-            markdown += "\n## 🖼️ Изображения\n\n"
-            images = self.find_images(folder)
-            for i, img in enumerate(images, 1):
-                markdown += f"![[{img.name}]]\n"
+            parts.append("\n## 🖼️ Изображения\n\n")
+            images = self.find_images(folder, entries)
+            parts.extend(f"![[{img.name}]]\n" for img in images)
         
-        markdown += "\n---\n\n*Создано автоматически модулем AI анализа [SecondBrain](https://t.me/sec_brainbot)*\n"
+        parts.append("\n---\n\n*Создано автоматически модулем AI анализа [SecondBrain](https://t.me/sec_brainbot)*\n")
         
         try:
-            note_file.write_text(markdown, encoding='utf-8')
+            # Секции пишутся в файл по очереди, без сборки общей строки
+            with note_file.open('w', encoding='utf-8', buffering=1 << 16) as f:
+                f.writelines(parts)
             print(f"✅ Сохранено: Knowledge.md")
+            if self._tree_cache is not None:
+                # В папке появился Knowledge.md - запомненный список устарел
+                self._tree_cache.pop(folder, None)
             # После успешного сохранения — попробуем индексировать в RAG (если модуль доступен)
-            try:
-                # Импортируем лениво — если модуль4 отсутствует, ничего не делаем
-                from src.modules.module4_rag import RAGEngine
-
+            if RAGEngine is not None:
                 try:
-                    # Ищем корень пользователя (например downloads/{user_folder})
-                    # Предположим, что папка контента лежит внутри папки пользователя
-                    user_root = None
-                    for p in note_file.parents:
-                        if p.name and (p.parent.name == 'downloads' or '_' in p.name or p.parent == Path('downloads')):
-                            user_root = p
-                            break
+                    # Одна база (и один RAGEngine) на все папки пользователя
+                    user_root = self._rag_root(folder)
+
+                    if self._pending_index is not None:
+                        # process_all проиндексирует все папки пользователя одним пакетом
+                        self._pending_index.setdefault(str(user_root), []).append(folder)
+                        return note_file
 
-                    rag = RAGEngine(user_root=user_root)
-                    # Запускаем индексирование в фоне, чтобы не блокировать основной поток
+                    rag = _get_rag(str(user_root))
+                    # Запускаем индексирование в фоновом пуле, чтобы не блокировать основной поток
                     def _run_index():
                         try:
                             indexed = rag.index_folder(folder)
@@ -374,20 +578,20 @@ processed: true
                         except Exception as e:
                             print(f"   ⚠️ RAG indexing failed (background): {e}")
 
-                    t = threading.Thread(target=_run_index, daemon=True)
-                    t.start()
+                    self._rag_pool.submit(_run_index)
                 except Exception as e:
                     print(f"   ⚠️ RAG indexing failed: {e}")
-            except ImportError:
-                # module4 not installed — пропускаем
-                pass
 
             return note_file
         except Exception as e:
             print(f"❌ Ошибка сохранения: {e}")
             return None
     
-    def should_process_folder(self, folder: Path) -> tuple[bool, str]:
+    def should_process_folder(
+        self,
+        folder: Path,
+        entries: Optional[Dict[str, os.DirEntry]] = None
+    ) -> tuple[bool, str]:
         """
         Проверяет, нужна ли AI обработка для папки
         
@@ -399,27 +603,30 @@ processed: true
         
         Args:
             folder: Папка для проверки
+            entries: Результат _scan(folder), если уже получен
             
         Returns:
             (нужна_обработка, причина)
         """
-        # 1. Если есть Knowledge.md - уже обработана
-        if self.has_analysis(folder):
+        if entries is None:
+            entries = self._scan(folder)
+        
+        # 1. Если есть Knowledge.md - уже обработана (если входные данные и модель не менялись)
+        if self.has_analysis(folder, entries) and self._is_up_to_date(folder, entries):
             return False, "Knowledge.md существует"
         
         # 2. Проверяем наличие ВИДЕО/АУДИО файлов (НЕ фото!)
         # Фото не требуют транскрибации и обрабатываются сразу
-        video_audio_extensions = ['.mp4', '.mov', '.avi', '.mkv', '.webm', '.mp3', '.m4a', '.wav', '.flac', '.ogg']
-        video_audio_files = [
-            f for f in folder.iterdir() 
-            if f.is_file() and f.suffix.lower() in video_audio_extensions
-        ]
+        has_video_audio = any(
+            os.path.splitext(name)[1].lower() in self.video_audio_extensions and entry.is_file()
+            for name, entry in entries.items()
+        )
         
-        has_transcript = (folder / "transcript.md").exists()
-        has_description = (folder / "description.md").exists()
+        has_transcript = "transcript.md" in entries
+        has_description = "description.md" in entries
         
         # 3. Если есть ВИДЕО/АУДИО файлы
-        if video_audio_files:
+        if has_video_audio:
             # Нужна транскрибация сначала
             if not has_transcript:
                 return False, "есть видео/аудио, но нет transcript.md (требуется Модуль 2)"
@@ -434,16 +641,26 @@ processed: true
         # 5. Вообще нет контента для анализа
         return False, "нет контента для обработки"
     
-    def _process_content_folder(self, folder: Path) -> dict:
+    def _process_content_folder(
+        self,
+        folder: Path,
+        entries: Optional[Dict[str, os.DirEntry]] = None,
+        decision: Optional[Tuple[bool, str]] = None
+    ) -> dict:
         """
         Обрабатывает одну папку
         
         Args:
             folder: Папка для обработки
+            entries: Результат _scan(folder), если уже получен
+            decision: Результат should_process_folder(folder), если уже получен
             
         Returns:
             Статистика обработки
         """
+        if entries is None:
+            entries = self._scan(folder)
+        
         stats = {
             'folder': folder.name,
             'already_processed': False,
@@ -454,7 +671,9 @@ processed: true
         }
         
         # Проверяем, нужна ли обработка
-        should_process, reason = self.should_process_folder(folder)
+        if decision is None:
+            decision = self.should_process_folder(folder, entries)
+        should_process, reason = decision
         
         if not should_process:
             print(f"⏭️  Пропуск: {folder.name} ({reason})")
@@ -467,16 +686,17 @@ processed: true
         print(f"✅ Обработка: {folder.name} ({reason})")
         
         # Анализируем
-        analysis = self.analyze_content(folder)
+        analysis = self.analyze_content(folder, entries)
         
         if not analysis:
             stats['error'] = "Нет данных или ошибка анализа"
             return stats
         
         # Создаем Knowledge.md
-        note_file = self.create_obsidian_note(folder, analysis)
+        note_file = self.create_obsidian_note(folder, analysis, entries, FolderMeta.from_name(folder.name))
         
         if note_file:
+            self._save_state(folder, entries)
             stats['success'] = True
             stats['new_tags'] = analysis.get('new_tags_count', 0)
         else:
@@ -489,23 +709,21 @@ processed: true
         Обрабатывает папку (рекурсивно, если это контейнер)
         """
         # Проверяем, выглядит ли папка как контент
-        should, reason = self.should_process_folder(folder)
+        entries = self._scan(folder)
+        should, reason = self.should_process_folder(folder, entries)
         
         # Если это контент (или уже обработанный контент)
         is_content = should or "Knowledge.md" in reason or "требуется Модуль 2" in reason
         
         if is_content:
-            return self._process_content_folder(folder)
+            return self._process_content_folder(folder, entries, (should, reason))
             
         # Если контента нет, пробуем рекурсию
-        try:
-            subfolders = [f for f in folder.iterdir() if f.is_dir()]
-        except Exception:
-            subfolders = []
+        subfolders = sorted(Path(entry.path) for entry in entries.values() if entry.is_dir())
             
         if not subfolders:
             # Нет подпапок - возвращаем результат как для пустой папки
-            return self._process_content_folder(folder)
+            return self._process_content_folder(folder, entries, (should, reason))
             
         print(f"📂 Папка {folder.name} — контейнер, проверяем {len(subfolders)} подпапок...")
         
@@ -535,6 +753,142 @@ processed: true
              
         return agg_stats
 
+    def _flush_index(self) -> None:
+        """Отправляет накопленные папки в RAG индексацию: один пакет на пользователя"""
+        pending, self._pending_index = self._pending_index or {}, None
+        
+        for user_root, folders in pending.items():
+            def _run_index(user_root=user_root, folders=folders):
+                try:
+                    indexed = _get_rag(user_root).index_folders(folders)
+                    print(f"   ✅ Indexed {indexed} chunks from {len(folders)} folders into user's RAG DB")
+                except Exception as e:
+                    print(f"   ⚠️ RAG indexing failed (background): {e}")
+            
+            self._rag_pool.submit(_run_index)
+    
+    def close(self) -> None:
+        """Дожидается фоновой RAG индексации и освобождает ресурсы"""
+        self._rag_pool.shutdown(wait=True)
+        if self.llm_cache:
+            self.llm_cache.close()
+    
+    def __enter__(self) -> "AIProcessor":
+        return self
+    
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+    
+    def _find_ready_folders(self, folder: Path) -> List[Path]:
+        """
+        Находит папки, готовые к AI анализу (тот же обход, что в process_folder)
+        
+        Args:
+            folder: Папка или контейнер
+            
+        Returns:
+            Список контент-папок, для которых нужен запрос к LLM
+        """
+        entries = self._scan(folder)
+        should, reason = self.should_process_folder(folder, entries)
+        if should:
+            return [folder]
+        if "Knowledge.md" in reason or "требуется Модуль 2" in reason:
+            return []
+        
+        subfolders = sorted(Path(entry.path) for entry in entries.values() if entry.is_dir())
+        
+        ready = []
+        for sub in subfolders:
+            if not sub.name.startswith('.'):
+                ready.extend(self._find_ready_folders(sub))
+        return ready
+    
+    async def _analyze_async(self, client, folder: Path, semaphore: asyncio.Semaphore, known_tags: str) -> Optional[Dict]:
+        """
+        Асинхронный запрос к LLM для одной папки
+        
+        Args:
+            client: ollama.AsyncClient текущего event loop
+            folder: Папка с контентом
+            semaphore: Ограничение числа одновременных запросов
+            known_tags: Строка известных тегов
+            
+        Returns:
+            Результат LLM или None
+        """
+        entries = self._scan(folder)
+        description = self.read_description(folder, entries)
+        transcript = self.read_transcript(folder, entries)
+        if not description and not transcript:
+            return None
+        
+        cache_key = self._cache_key(description, transcript, known_tags)
+        if self.llm_cache:
+            cached = self.llm_cache.get(cache_key)
+            if cached is not None:
+                return cached
+        
+        async with semaphore:
+            summary = await self.brain.aanalyze(
+                client,
+                caption=description or "",
+                transcript=transcript or "",
+                comments=[],
+                author="",
+                known_tags=known_tags
+            )
+        
+        if summary and self.llm_cache:
+            self.llm_cache.set(cache_key, summary)
+        return summary
+    
+    async def _gather_analyses(self, folders: List[Path], parallel: int) -> List:
+        """Запускает анализ папок параллельно (не больше parallel запросов)"""
+        semaphore = asyncio.Semaphore(parallel)
+        known_tags = self.tag_manager.get_tags_string()
+        # Клиент живет только в этом event loop (asyncio.run закрывает loop)
+        client = self.brain.create_async_client()
+        try:
+            return await asyncio.gather(
+                *(self._analyze_async(client, folder, semaphore, known_tags) for folder in folders),
+                return_exceptions=True
+            )
+        finally:
+            await self.brain.close_async_client(client)
+    
+    def prefetch_analyses(self, folders: List[Path]) -> None:
+        """
+        Заранее получает ответы LLM для всех готовых папок параллельно
+        
+        Ollama обрабатывает до OLLAMA_NUM_PARALLEL запросов одновременно,
+        поэтому запросы отправляются через AsyncClient под семафором.
+        Заметки и теги затем создаются последовательно в process_folder.
+        
+        Args:
+            folders: Папки верхнего уровня
+        """
+        parallel = int(os.getenv("OLLAMA_NUM_PARALLEL", "4"))
+        ready = [ready for folder in folders for ready in self._find_ready_folders(folder)]
+        if parallel <= 1 or len(ready) < 2:
+            return
+        
+        print(f"🚀 Параллельный AI анализ: {len(ready)} папок, до {parallel} запросов одновременно")
+        results = asyncio.run(self._gather_analyses(ready, parallel))
+        for folder, result in zip(ready, results):
+            # При ошибке или пустом ответе папка будет проанализирована обычным синхронным вызовом
+            if isinstance(result, BaseException):
+                print(f"   ⚠️ Параллельный анализ {folder.name} не удался: {result}")
+            elif result is not None:
+                self._prefetched_summaries[folder] = result
+    
+    def _process_numbered(self, i: int, total: int, folder: Path) -> dict:
+        """Обрабатывает папку верхнего уровня с заголовком [i/total]"""
+        print(f"\n{'='*70}")
+        print(f"📂 [{i}/{total}] {folder.name}")
+        print(f"{'='*70}")
+        return self.process_folder(folder)
+    
     def process_all(self) -> dict:
         """
         Обрабатывает все папки
@@ -548,6 +902,22 @@ processed: true
         print(f"📁 Директория: {self.content_dir}")
         print(f"🏷️  База тегов: {self.tag_manager.tags_file}")
         
+        # Каждый каталог читается один раз за запуск, строка тегов - тоже
+        self._tree_cache = {}
+        self._tags_snapshot = self.tag_manager.get_tags_string()
+        try:
+            return self._process_all_folders()
+        finally:
+            self._tree_cache = None
+            self._tags_snapshot = None
+    
+    def _process_all_folders(self) -> dict:
+        """
+        Основной проход process_all (с включенным _tree_cache)
+        
+        Returns:
+            Общая статистика
+        """
         # Находим папки
         folders = self.find_content_folders()
         
@@ -568,14 +938,27 @@ processed: true
             'total_new_tags': 0
         }
         
-        # Обрабатываем каждую папку
-        for i, folder in enumerate(folders, 1):
-            print(f"\n{'='*70}")
-            print(f"📂 [{i}/{len(folders)}] {folder.name}")
-            print(f"{'='*70}")
-            
-            stats = self.process_folder(folder)
-            
+        # Уже обработанные папки находим заранее (stat вместо сканирования каждой папки)
+        processed = {
+            p.parent for p in self.content_dir.glob('*/Knowledge.md')
+            if self._is_up_to_date(p.parent)
+        }
+        total_stats['already_processed'] = len(processed)
+        if processed:
+            print(f"⏭️  Уже обработано (Knowledge.md): {len(processed)}")
+        pending = [folder for folder in folders if folder not in processed]
+        
+        # Запросы к LLM для всех готовых папок - параллельно
+        self.prefetch_analyses(pending)
+        
+        # Обрабатываем каждую папку (RAG индексация - одним пакетом в конце)
+        self._pending_index = {}
+        try:
+            all_stats = [self._process_numbered(i, len(pending), folder) for i, folder in enumerate(pending, 1)]
+        finally:
+            self._flush_index()
+        
+        for stats in all_stats:
             if stats['already_processed']:
                 total_stats['already_processed'] += 1
             elif stats['success']:
@@ -640,15 +1023,33 @@ def main():
         type=str,
         help='Обработать только одну папку (имя папки)'
     )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Не использовать кэш ответов LLM'
+    )
+    parser.add_argument(
+        '--verbose',
+        action='store_true',
+        help='Печатать полный traceback при ошибках анализа'
+    )
     
     args = parser.parse_args()
     
     processor = AIProcessor(
         content_dir=args.dir,
         tags_file=args.tags,
-        model=args.model
+        model=args.model,
+        use_cache=not args.no_cache,
+        verbose=args.verbose
     )
     
+    with processor:
+        _run(processor, args)
+
+
+def _run(processor: AIProcessor, args) -> None:
+    """Запуск обработки по аргументам командной строки"""
     if args.folder:
         # Обработка одной папки
         folder_path = args.dir / args.folder
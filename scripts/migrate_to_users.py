@@ -10,8 +10,79 @@
 """
 import shutil
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+# Структура папок для каждого пользователя
+SUBDIRS = ["downloads", "Context", "Goals", "Reviews", 
+           "Projects", "Meetings", "achievements"]
+
+# Пользователи обрабатываются в потоках - вывод одного пользователя печатается целиком
+_print_lock = threading.Lock()
+
+
+def _migrate_user(item: Path, new_dir: Path) -> int:
+    """
+    Переносит контент одного пользователя
+    
+    Args:
+        item: Старая папка пользователя downloads/{username}/
+        new_dir: Новая корневая папка users/
+        
+    Returns:
+        Количество перенесенных объектов
+    """
+    username = item.name
+    log = [f"\n👤 Пользователь: {username}"]
+    
+    new_user_root = new_dir / username
+    new_downloads = new_user_root / "downloads"
+    
+    # Создаем структуру
+    for subdir in SUBDIRS:
+        (new_user_root / subdir).mkdir(parents=True, exist_ok=True)
+    log.append("  creating structure... OK")
+    
+    # На одной файловой системе перенос - это rename (без копирования данных)
+    same_device = os.stat(item).st_dev == os.stat(new_downloads).st_dev
+    
+    # Переносим контент из downloads/{username}/ в users/{username}/downloads/
+    # Если в старой папке лежат папки контента (YYYY-MM-DD...)
+    count = 0
+    for content_item in item.iterdir():
+        # Если это папка контента
+        dest = new_downloads / content_item.name
+        
+        if dest.exists():
+            log.append(f"  ⚠️  {content_item.name} уже существует в новом месте (пропуск)")
+            continue
+            
+        try:
+            # Перемещаем
+            if same_device:
+                try:
+                    os.rename(content_item, dest)
+                except OSError:
+                    shutil.move(str(content_item), str(dest))
+            else:
+                shutil.move(str(content_item), str(dest))
+            count += 1
+        except Exception as e:
+            log.append(f"  ❌ Ошибка переноса {content_item.name}: {e}")
+    
+    log.append(f"  ✅ Перенесено {count} объектов")
+    
+    # Если старая папка пользователя стала пустой, удаляем её
+    if not any(item.iterdir()):
+        item.rmdir()
+        log.append("  🗑️  Удалена пустая старая папка пользователя")
+    
+    with _print_lock:
+        print("\n".join(log))
+    return count
+
+
 def migrate():
     old_dir = Path('downloads')
     new_dir = Path('users')
@@ -29,57 +100,13 @@ def migrate():
     
     print(f"🚀 Начинаем миграцию: {old_dir} -> {new_dir}")
     
-    # Структура папок для каждого пользователя
-    subdirs = ["downloads", "Context", "Goals", "Reviews", 
-               "Projects", "Meetings", "achievements"]
+    # Пользователи независимы - переносим их параллельно
+    users = [u for u in old_dir.iterdir() if u.is_dir() and not u.name.startswith('.')]
+    with ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) * 4)) as executor:
+        counts = list(executor.map(lambda user: _migrate_user(user, new_dir), users))
+    
+    print(f"\n📦 Пользователей: {len(users)}, перенесено объектов: {sum(counts)}")
     
-    # Итерируемся по пользователям в старой папке
-    for item in old_dir.iterdir():
-        if not item.is_dir():
-            continue
-            
-        username = item.name
-        
-        # Пропускаем hidden папки или файлы
-        if username.startswith('.'):
-            continue
-            
-        print(f"\n👤 Пользователь: {username}")
-        
-        new_user_root = new_dir / username
-        new_downloads = new_user_root / "downloads"
-        
-        # Создаем структуру
-        print("  creating structure...", end=" ")
-        for subdir in subdirs:
-            (new_user_root / subdir).mkdir(parents=True, exist_ok=True)
-        print("OK")
-        
-        # Переносим контент из downloads/{username}/ в users/{username}/downloads/
-        # Если в старой папке лежат папки контента (YYYY-MM-DD...)
-        count = 0
-        for content_item in item.iterdir():
-            # Если это папка контента
-            dest = new_downloads / content_item.name
-            
-            if dest.exists():
-                print(f"  ⚠️  {content_item.name} уже существует в новом месте (пропуск)")
-                continue
-                
-            try:
-                # Перемещаем
-                shutil.move(str(content_item), str(dest))
-                count += 1
-            except Exception as e:
-                print(f"  ❌ Ошибка переноса {content_item.name}: {e}")
-        
-        print(f"  ✅ Перенесено {count} объектов")
-        
-        # Если старая папка пользователя стала пустой, удаляем её
-        if not any(item.iterdir()):
-            item.rmdir()
-            print("  🗑️  Удалена пустая старая папка пользователя")
-            
     # Проверяем, пуста ли downloads
     if old_dir.exists() and not any(old_dir.iterdir()):
         try:
@@ -23,6 +23,9 @@ class BotConfig(BaseSettings):
     whisper_model: str = Field("small", alias="WHISPER_MODEL")
     whisper_threads: int = Field(16, alias="WHISPER_THREADS")
 
+    # Limits
+    max_concurrent_downloads: int = Field(4, alias="MAX_CONCURRENT_DOWNLOADS")
+
 
     # Logs
     transcribe_log: Path = Path("logs/transcribe.log")
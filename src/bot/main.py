@@ -1,7 +1,6 @@
 import asyncio
 import logging
 import sys
-import uvloop
 from pathlib import Path
 
 # Setup logging
@@ -53,9 +52,13 @@ async def main() -> None:
     await dp.start_polling(bot)
 
 if __name__ == "__main__":
-    # Install uvloop policy
+    # Install uvloop policy (optional: fall back to the stock loop if it is missing)
     if sys.platform != "win32":
-        uvloop.install()
+        try:
+            import uvloop
+            uvloop.install()
+        except ImportError:
+            logger.warning("uvloop not installed, using the default asyncio loop")
     
     try:
         asyncio.run(main())
@@ -1,19 +1,61 @@
+import asyncio
+import atexit
 import re
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Dict, Optional
 from aiogram import Router, types, F
 from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
 from src.bot.config import BotConfig
 from src.bot.states import ContentStates
+from src.bot.services.status_updater import StatusUpdater
 from src.modules.content_router import ContentRouter
 from src.modules.downloader_base import DownloadSettings
 
 router = Router()
 
+# Downloads run in their own pool so they never starve (or get starved by) other blocking work
+DOWNLOAD_EXEC = ThreadPoolExecutor(max_workers=4, thread_name_prefix="download")
+atexit.register(DOWNLOAD_EXEC.shutdown, wait=False)
+
+# Backpressure: at most two URLs per user in flight, and a global cap on downloads
+USER_URL_LIMIT = 2
+BUSY_MSG = "⏳ Обрабатываю предыдущие — подожди"
+_user_sem: Dict[int, asyncio.Semaphore] = {}
+_download_sem: Optional[asyncio.Semaphore] = None
+
+
+def _sem(user_id: int) -> asyncio.Semaphore:
+    return _user_sem.setdefault(user_id, asyncio.Semaphore(USER_URL_LIMIT))
+
+
+def _global_sem(config: BotConfig) -> asyncio.Semaphore:
+    # Created lazily: the limit comes from the config injected into handlers
+    global _download_sem
+    if _download_sem is None:
+        _download_sem = asyncio.Semaphore(config.max_concurrent_downloads)
+    return _download_sem
+
+# Messages handled by handle_url: must start with a YouTube/Instagram link.
+# Compiled once; match() keeps the anchoring of the former F.text.regexp filter
+SUPPORTED_URL_RE = re.compile(r'(https?://)?(www\.)?(youtube\.com|youtu\.be|instagram\.com)')
+
+
+def _is_supported_url(text: str) -> bool:
+    return SUPPORTED_URL_RE.match(text) is not None
+
+# Download folders already created in this process: {users_dir: path}
+_folder_cache: Dict[Path, Path] = {}
+
 def get_user_folder(user_id: int, username: str, config: BotConfig) -> Path:
     # Single user mode: always use 'admin' folder
-    path = config.users_dir / "admin" / "downloads"
-    path.mkdir(parents=True, exist_ok=True)
+    path = _folder_cache.get(config.users_dir)
+    if path is None:
+        path = config.users_dir / "admin" / "downloads"
+        # mkdir only on the first call instead of on every message
+        path.mkdir(parents=True, exist_ok=True)
+        _folder_cache[config.users_dir] = path
     return path
 
 @router.message(Command("url"))
@@ -23,7 +65,7 @@ async def cmd_url(message: types.Message, state: FSMContext):
     await message.answer("🔗 Пришли мне ссылку на YouTube или Instagram:")
 
 @router.message(ContentStates.waiting_url)
-@router.message(F.text & F.text.regexp(r'(https?://)?(www\.)?(youtube\.com|youtu\.be|instagram\.com)'))
+@router.message(F.text.func(_is_supported_url))
 async def handle_url(message: types.Message, state: FSMContext, config: BotConfig):
     """Handle YouTube/Instagram URLs"""
     # If we were waiting for URL, clear state
@@ -31,8 +73,20 @@ async def handle_url(message: types.Message, state: FSMContext, config: BotConfi
     if current_state == ContentStates.waiting_url:
         await state.clear()
         
+    # Drop the URL instead of piling up work while the user's previous ones are running
+    sem = _sem(message.from_user.id)
+    if sem.locked():
+        await message.reply(BUSY_MSG)
+        return
+    
+    async with sem:
+        await _process_url(message, config)
+
+async def _process_url(message: types.Message, config: BotConfig):
+    """Download the URL from the message and report progress"""
     url = message.text.strip()
     status_msg = await message.reply("🔎 Анализирую ссылку...")
+    status = StatusUpdater(status_msg)
     
     try:
         user_folder = get_user_folder(message.from_user.id, message.from_user.username, config)
@@ -45,18 +99,18 @@ async def handle_url(message: types.Message, state: FSMContext, config: BotConfi
         content_router = ContentRouter(settings, user_folder)
         
         if not content_router.is_supported(url):
-            await status_msg.edit_text("❌ URL не поддерживается или не распознан.")
+            await status.flush("❌ URL не поддерживается или не распознан.")
             return
 
-        await status_msg.edit_text("⬇️ Начинаю загрузку...")
+        await status.set("⬇️ Начинаю загрузку...")
         
-        # Download (blocking call, ideal to offload to thread/process in real prod)
-        # For now we keep it async-blocking as per original design, but in aiogram 3 we should be careful.
-        # Ideally: await asyncio.to_thread(content_router.download, url)
-        import asyncio
-        result = await asyncio.to_thread(content_router.download, url)
+        # Download (blocking call) runs in the dedicated download pool
+        async with _global_sem(config):
+            result = await asyncio.get_running_loop().run_in_executor(
+                DOWNLOAD_EXEC, content_router.download, url
+            )
         
-        await status_msg.edit_text(
+        await status.flush(
             f"✅ <b>Загрузка завершена!</b>\n\n"
             f"📁 Папка: <code>{result.folder_path.name}</code>\n"
             f"📦 Файлов: {len(result.media_files)}\n\n"
@@ -64,7 +118,7 @@ async def handle_url(message: types.Message, state: FSMContext, config: BotConfi
         )
         
     except Exception as e:
-        await status_msg.edit_text(f"❌ Ошибка загрузки: {str(e)[:200]}")
+        await status.flush(f"❌ Ошибка загрузки: {str(e)[:200]}")
 
 @router.message(F.photo | F.video | F.document)
 async def handle_media(message: types.Message, state: FSMContext, config: BotConfig):
@@ -1,45 +1,122 @@
 import asyncio
+import atexit
+import os
 import sys
 import logging
+import multiprocessing
 from pathlib import Path
-import subprocess
+from typing import IO, Dict, Optional, Set, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from aiogram import Router, types, F, Bot
 from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
 
 from src.bot.config import BotConfig
 from src.bot.services.process_queue import queue
-from src.modules.local_ears import LocalEars
+from src.modules.local_ears import LocalEars, TranscriptResult
 
 router = Router()
 logger = logging.getLogger(__name__)
 
+# Keeps references to fire-and-forget tasks until they finish
+_background_tasks: Set[asyncio.Task] = set()
+
+# Whisper runs in a worker process, so inference never holds the bot's GIL.
+# One pool per (model_size, num_threads); each worker loads the model once.
+_whisper_pools: Dict[Tuple[str, int], ProcessPoolExecutor] = {}
+
+# LocalEars preloaded inside a Whisper worker process
+_worker_ears: Optional[LocalEars] = None
+
+
+def _init_worker(model_size: str, num_threads: int) -> None:
+    """Load the Whisper model when the worker process starts"""
+    global _worker_ears
+    _worker_ears = LocalEars(model_size=model_size, num_threads=num_threads)
+
+
+def _do_transcribe(file_path: str) -> Optional[TranscriptResult]:
+    """Transcribe with the preloaded model (runs in the worker process)"""
+    return _worker_ears.transcribe(Path(file_path))
+
+
+def get_whisper_pool(config: BotConfig) -> ProcessPoolExecutor:
+    """Return the shared Whisper pool for the configured model (started on first use)"""
+    key = (config.whisper_model, config.whisper_threads)
+    pool = _whisper_pools.get(key)
+    if pool is None:
+        # spawn, not fork: forking the running bot would copy its loop and threads
+        pool = _whisper_pools[key] = ProcessPoolExecutor(
+            max_workers=1,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=key
+        )
+    return pool
+
+
+def _drop_whisper_pool(config: BotConfig, pool: ProcessPoolExecutor) -> None:
+    """Forget a broken pool so the next call starts a fresh worker"""
+    key = (config.whisper_model, config.whisper_threads)
+    if _whisper_pools.get(key) is pool:
+        del _whisper_pools[key]
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+async def transcribe_in_pool(config: BotConfig, file_path: Path) -> Optional[TranscriptResult]:
+    """Run _do_transcribe in the Whisper pool, retrying once if the worker died"""
+    loop = asyncio.get_running_loop()
+    for attempt in range(2):
+        pool = get_whisper_pool(config)
+        try:
+            # Only the path goes in and the pickled TranscriptResult comes back
+            return await loop.run_in_executor(pool, _do_transcribe, str(file_path))
+        except BrokenProcessPool:
+            # Worker was killed (OOM, crash in CT2): the pool is unusable from now on
+            logger.warning("Whisper worker died, restarting the pool")
+            _drop_whisper_pool(config, pool)
+            if attempt:
+                raise
+
+
+@atexit.register
+def _shutdown_whisper_pools() -> None:
+    for pool in _whisper_pools.values():
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _write_transcript(transcript_path: Path, result: TranscriptResult) -> None:
+    """Write transcript.md with a single write() call"""
+    body = "".join((
+        "# Транскрипция\n\n",
+        f"**Язык:** {result.language}\n",
+        f"**Длительность:** {result.duration:.1f} сек\n\n",
+        "## С таймкодами\n\n",
+        result.timed_transcript,
+        "\n\n## Полный текст\n\n",
+        result.full_text,
+    ))
+    transcript_path.write_text(body, encoding='utf-8')
+
+
 async def run_transcription(file_path: Path, output_dir: Path, config: BotConfig, message: types.Message):
-    """Run transcription in executor"""
-    status_msg = await message.answer("🎤 Транскрибирую видео...\nЭто может занять несколько минут.")
+    """Wait for the transcription slot, then run transcription in executor"""
+    user = message.from_user
+    await queue.acquire_transcribe(user.id, user.username)
     
     try:
-        ears = LocalEars(
-            model_size=config.whisper_model,
-            num_threads=config.whisper_threads
-        )
-        
-        loop = asyncio.get_event_loop()
-        transcript_result = await loop.run_in_executor(
-            None,
-            lambda: ears.transcribe(file_path)
-        )
+        status_msg = await message.answer("🎤 Транскрибирую видео...\nЭто может занять несколько минут.")
+    except Exception:
+        await queue.release_transcribe()
+        raise
+    
+    try:
+        transcript_result = await transcribe_in_pool(config, file_path)
         
         if transcript_result:
-            transcript_path = output_dir / "transcript.md"
-            with open(transcript_path, 'w', encoding='utf-8') as f:
-                f.write(f"# Транскрипция\n\n")
-                f.write(f"**Язык:** {transcript_result.language}\n")
-                f.write(f"**Длительность:** {transcript_result.duration:.1f} сек\n\n")
-                f.write("## С таймкодами\n\n")
-                f.write(transcript_result.timed_transcript)
-                f.write("\n\n## Полный текст\n\n")
-                f.write(transcript_result.full_text)
+            # Building and writing a long transcript happens off the event loop
+            await asyncio.to_thread(_write_transcript, output_dir / "transcript.md", transcript_result)
             
             await status_msg.edit_text(
                 f"✅ Транскрипция готова!\n\n"
@@ -54,7 +131,44 @@ async def run_transcription(file_path: Path, output_dir: Path, config: BotConfig
         logger.error(f"Transcription error: {e}", exc_info=True)
         await status_msg.edit_text(f"❌ Ошибка транскрибации: {str(e)[:100]}")
     finally:
-        queue.finish_transcribe()
+        await queue.release_transcribe()
+
+
+# Media extensions /transcribe picks up (without the dot)
+_MEDIA_EXT = frozenset({"mp4", "mp3", "m4a"})
+
+
+def _find_target_file(user_folder: Path) -> Optional[Tuple[Optional[Path], Optional[Path]]]:
+    """
+    Find the newest content folder and its media file.
+    
+    Returns None if user_folder does not exist, otherwise (latest_folder, target_file)
+    where either part is None when nothing was found.
+    """
+    if not user_folder.exists():
+        return None
+
+    # Newest folder in one pass: DirEntry.stat() is cached, one comparison per folder
+    latest_folder = None
+    latest_mtime = -1.0
+    with os.scandir(user_folder) as it:
+        for e in it:
+            if not e.is_dir():
+                continue
+            mtime = e.stat().st_mtime
+            if mtime > latest_mtime:
+                latest_mtime, latest_folder = mtime, Path(e.path)
+    if latest_folder is None:
+        return None, None
+        
+    # Find video file (one directory pass, stop at the first match)
+    with os.scandir(latest_folder) as it:
+        target_file = next(
+            (Path(e.path) for e in it
+             if e.is_file() and e.name.rpartition(".")[2].lower() in _MEDIA_EXT),
+            None
+        )
+    return latest_folder, target_file
 
 
 @router.message(Command("transcribe"))
@@ -65,34 +179,49 @@ async def cmd_transcribe(message: types.Message, state: FSMContext, config: BotC
     # For now, let's assume we look at the last folder in user dir.
     
     user_folder = config.users_dir / "admin" / "downloads"
-    # Find latest folder
-    if not user_folder.exists():
+    # Directory scans block, so they run off the event loop
+    found = await asyncio.to_thread(_find_target_file, user_folder)
+    if found is None:
         await message.reply("📂 Нет загруженных файлов.")
         return
 
-    # Sort by time
-    folders = sorted([f for f in user_folder.iterdir() if f.is_dir()], key=lambda x: x.stat().st_mtime, reverse=True)
-    if not folders:
+    latest_folder, target_file = found
+    if latest_folder is None:
         await message.reply("📂 Нет папок с контентом.")
         return
-        
-    latest_folder = folders[0]
-    # Find video file
-    video_files = list(latest_folder.glob("*.mp4")) + list(latest_folder.glob("*.mp3")) + list(latest_folder.glob("*.m4a"))
     
-    if not video_files:
+    if target_file is None:
         await message.reply(f"⚠️ В папке {latest_folder.name} нет медиа для транскрибации.")
         return
-        
-    target_file = video_files[0]
     
-    if not queue.can_start_transcribe():
-        pos = queue.add_to_transcribe_queue(message.from_user.id, message.from_user.username)
-        await message.reply(f"⏳ Добавлен в очередь транскрибации (позиция {pos})")
+    user = message.from_user
+    status = queue.get_transcribe_status(user.id)
+    if status['status'] != 'not_in_queue':
+        await message.reply("⏳ Транскрибация уже запущена или ожидает в очереди.")
         return
 
-    queue.start_transcribe(message.from_user.id, message.from_user.username, 0)
-    asyncio.create_task(run_transcription(target_file, latest_folder, config, message))
+    # Claim the place in line before any await, so a second /transcribe sees it;
+    # run_transcription then waits for its turn (acquire keeps this entry)
+    position = queue.add_to_transcribe_queue(user.id, user.username)
+    task = asyncio.create_task(run_transcription(target_file, latest_folder, config, message))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+    if queue.transcribe_running is not None or position > 1:
+        await message.reply(f"⏳ Добавлен в очередь транскрибации (позиция {position})")
+
+
+def _open_log(log_path: Path) -> IO:
+    """Create the log directory and open a fresh log file"""
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    return open(log_path, 'w')
+
+
+async def _watch_ai(process: asyncio.subprocess.Process, config: BotConfig) -> None:
+    """Wait for module3_analyze.py to exit and clear its PID file"""
+    returncode = await process.wait()
+    logger.info(f"AI analysis (PID {process.pid}) exited with code {returncode}")
+    config.ai_pid.unlink(missing_ok=True)
 
 
 @router.message(Command("ai"))
@@ -107,20 +236,24 @@ async def cmd_ai(message: types.Message, config: BotConfig, bot: Bot):
     try:
         # Run module3_analyze.py
         # Assuming it's in root
-        cmd = [sys.executable, "module3_analyze.py"]
-        
-        config.ai_log.parent.mkdir(parents=True, exist_ok=True)
-        config.ai_log.write_text("")
-        
-        process = subprocess.Popen(
-            cmd,
-            cwd=Path.cwd(),
-            stdout=open(config.ai_log, 'w'),
-            stderr=subprocess.STDOUT,
-            start_new_session=True
-        )
+        log_file = await asyncio.to_thread(_open_log, config.ai_log)
+        try:
+            process = await asyncio.create_subprocess_exec(
+                sys.executable, "module3_analyze.py",
+                cwd=str(Path.cwd()),
+                stdout=log_file,
+                stderr=asyncio.subprocess.STDOUT,
+                start_new_session=True
+            )
+        finally:
+            # The child keeps its own copy of the descriptor
+            log_file.close()
         
         config.ai_pid.write_text(str(process.pid))
+        # Remove the PID file when the analysis exits, so /ai can be started again
+        task = asyncio.create_task(_watch_ai(process, config))
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
         
         await status_msg.edit_text(
             f"✅ **AI Анализ запущен!**\n"
@@ -128,8 +261,6 @@ async def cmd_ai(message: types.Message, config: BotConfig, bot: Bot):
             f"📋 Логи: `{config.ai_log}`"
         )
         
-        # Log tailing task would go here (simplified for now)
-        
     except Exception as e:
         await status_msg.edit_text(f"❌ Ошибка запуска: {e}")
 
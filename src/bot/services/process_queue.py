@@ -1,128 +1,191 @@
-from typing import Optional, List, Tuple, Dict
+import asyncio
+from collections import OrderedDict
+from typing import Optional, Tuple, Dict
 from datetime import datetime
 
+# Waiting users in arrival order: {user_id: (username, timestamp)}
+QueueItems = OrderedDict[int, Tuple[str, datetime]]
+
+QUEUE_NAMES = ("transcribe", "ai", "rag")
+
+
+class _Queue:
+    """Waiting line and running slot of one process type"""
+
+    __slots__ = ("items", "running")
+
+    def __init__(self):
+        self.items: QueueItems = OrderedDict()
+        self.running: Optional[Tuple[int, str, int]] = None  # (user_id, username, pid)
+
+    def add(self, user_id: int, username: str) -> int:
+        """Adds user to the queue (once). Returns position."""
+        if user_id in self.items:
+            return self.position(user_id)
+        self.items[user_id] = (username, datetime.now())
+        return len(self.items)
+
+    def position(self, user_id: int) -> Optional[int]:
+        """1-based position of the user in the queue, or None"""
+        return next((i for i, uid in enumerate(self.items, 1) if uid == user_id), None)
+
+    def start(self, user_id: int, username: str, pid: int):
+        self.running = (user_id, username, pid)
+        self.items.pop(user_id, None)
+
+    def finish(self):
+        self.running = None
+
+    def status(self, user_id: int) -> Dict:
+        running = self.running
+        if running and running[0] == user_id:
+            return {
+                'status': 'running',
+                'position': 0,
+                'pid': running[2]
+            }
+
+        position = self.position(user_id)
+        if position is not None:
+            return {
+                'status': 'queued',
+                'position': position,
+                'total': len(self.items)
+            }
+
+        return {'status': 'not_in_queue'}
+
+    def can_start(self) -> bool:
+        return self.running is None and len(self.items) > 0
+
+    def is_next(self, user_id: int) -> bool:
+        """Slot is free and the user is first in line"""
+        return self.running is None and next(iter(self.items), None) == user_id
+
+
 class ProcessQueue:
     """Global queue for managing transcription, AI, and RAG processes"""
-    
+
     def __init__(self):
-        self.transcribe_queue: List[Tuple[int, str, datetime]] = []  # [(user_id, username, timestamp)]
-        self.ai_queue: List[Tuple[int, str, datetime]] = []        # [(user_id, username, timestamp)]
-        self.rag_queue: List[Tuple[int, str, datetime]] = []       # [(user_id, username, timestamp)]
-        
-        self.transcribe_running: Optional[Tuple[int, str, int]] = None  # (user_id, username, pid)
-        self.ai_running: Optional[Tuple[int, str, int]] = None        # (user_id, username, pid)
-        self.rag_running: Optional[Tuple[int, str, int]] = None       # (user_id, username, pid)
-    
+        self.queues: Dict[str, _Queue] = {name: _Queue() for name in QUEUE_NAMES}
+
+        # Guards all queue state; waiters are woken when a process finishes
+        self._cond = asyncio.Condition()
+
+    def get(self, name: str) -> _Queue:
+        return self.queues[name]
+
+    async def acquire(self, name: str, user_id: int, username: str, pid: int = 0) -> None:
+        """Queues the user and waits until the slot is free and the user is first in line"""
+        q = self.queues[name]
+        async with self._cond:
+            q.add(user_id, username)
+            try:
+                await self._cond.wait_for(lambda: q.is_next(user_id))
+            except asyncio.CancelledError:
+                # Leave the line so the next user is not blocked
+                q.items.pop(user_id, None)
+                self._cond.notify_all()
+                raise
+            q.start(user_id, username, pid)
+
+    async def release(self, name: str) -> None:
+        """Marks the slot free and wakes the waiting users"""
+        async with self._cond:
+            self.queues[name].finish()
+            self._cond.notify_all()
+
+    # Backward-compatible per-type API, delegating to the generic queues
+
+    @property
+    def transcribe_queue(self) -> QueueItems:
+        return self.queues["transcribe"].items
+
+    @property
+    def ai_queue(self) -> QueueItems:
+        return self.queues["ai"].items
+
+    @property
+    def rag_queue(self) -> QueueItems:
+        return self.queues["rag"].items
+
+    @property
+    def transcribe_running(self) -> Optional[Tuple[int, str, int]]:
+        return self.queues["transcribe"].running
+
+    @property
+    def ai_running(self) -> Optional[Tuple[int, str, int]]:
+        return self.queues["ai"].running
+
+    @property
+    def rag_running(self) -> Optional[Tuple[int, str, int]]:
+        return self.queues["rag"].running
+
+    async def acquire_transcribe(self, user_id: int, username: str, pid: int = 0) -> None:
+        await self.acquire("transcribe", user_id, username, pid)
+
+    async def acquire_ai(self, user_id: int, username: str, pid: int = 0) -> None:
+        await self.acquire("ai", user_id, username, pid)
+
+    async def acquire_rag(self, user_id: int, username: str, pid: int = 0) -> None:
+        await self.acquire("rag", user_id, username, pid)
+
+    async def release_transcribe(self) -> None:
+        await self.release("transcribe")
+
+    async def release_ai(self) -> None:
+        await self.release("ai")
+
+    async def release_rag(self) -> None:
+        await self.release("rag")
+
     def add_to_transcribe_queue(self, user_id: int, username: str) -> int:
         """Adds user to transcribe queue. Returns position."""
-        for item in self.transcribe_queue:
-            if item[0] == user_id:
-                return self.transcribe_queue.index(item) + 1
-        
-        self.transcribe_queue.append((user_id, username, datetime.now()))
-        return len(self.transcribe_queue)
-    
+        return self.queues["transcribe"].add(user_id, username)
+
     def add_to_ai_queue(self, user_id: int, username: str) -> int:
         """Adds user to AI queue. Returns position."""
-        for item in self.ai_queue:
-            if item[0] == user_id:
-                return self.ai_queue.index(item) + 1
-        
-        self.ai_queue.append((user_id, username, datetime.now()))
-        return len(self.ai_queue)
+        return self.queues["ai"].add(user_id, username)
 
     def add_to_rag_queue(self, user_id: int, username: str) -> int:
         """Adds user to RAG queue. Returns position."""
-        for item in self.rag_queue:
-            if item[0] == user_id:
-                return self.rag_queue.index(item) + 1
+        return self.queues["rag"].add(user_id, username)
 
-        self.rag_queue.append((user_id, username, datetime.now()))
-        return len(self.rag_queue)
-    
     def start_transcribe(self, user_id: int, username: str, pid: int):
-        self.transcribe_running = (user_id, username, pid)
-        self.transcribe_queue = [item for item in self.transcribe_queue if item[0] != user_id]
-    
+        self.queues["transcribe"].start(user_id, username, pid)
+
     def start_ai(self, user_id: int, username: str, pid: int):
-        self.ai_running = (user_id, username, pid)
-        self.ai_queue = [item for item in self.ai_queue if item[0] != user_id]
+        self.queues["ai"].start(user_id, username, pid)
 
     def start_rag(self, user_id: int, username: str, pid: int):
-        self.rag_running = (user_id, username, pid)
-        self.rag_queue = [item for item in self.rag_queue if item[0] != user_id]
-    
+        self.queues["rag"].start(user_id, username, pid)
+
     def finish_transcribe(self):
-        self.transcribe_running = None
-    
+        self.queues["transcribe"].finish()
+
     def finish_ai(self):
-        self.ai_running = None
+        self.queues["ai"].finish()
 
     def finish_rag(self):
-        self.rag_running = None
-    
+        self.queues["rag"].finish()
+
     def get_transcribe_status(self, user_id: int) -> Dict:
-        if self.transcribe_running and self.transcribe_running[0] == user_id:
-            return {
-                'status': 'running',
-                'position': 0,
-                'pid': self.transcribe_running[2]
-            }
-        
-        for i, item in enumerate(self.transcribe_queue):
-            if item[0] == user_id:
-                return {
-                    'status': 'queued',
-                    'position': i + 1,
-                    'total': len(self.transcribe_queue)
-                }
-        
-        return {'status': 'not_in_queue'}
-    
+        return self.queues["transcribe"].status(user_id)
+
     def get_ai_status(self, user_id: int) -> Dict:
-        if self.ai_running and self.ai_running[0] == user_id:
-            return {
-                'status': 'running',
-                'position': 0,
-                'pid': self.ai_running[2]
-            }
-        
-        for i, item in enumerate(self.ai_queue):
-            if item[0] == user_id:
-                return {
-                    'status': 'queued',
-                    'position': i + 1,
-                    'total': len(self.ai_queue)
-                }
-        
-        return {'status': 'not_in_queue'}
+        return self.queues["ai"].status(user_id)
 
     def get_rag_status(self, user_id: int) -> Dict:
-        if self.rag_running and self.rag_running[0] == user_id:
-            return {
-                'status': 'running',
-                'position': 0,
-                'pid': self.rag_running[2]
-            }
-
-        for i, item in enumerate(self.rag_queue):
-            if item[0] == user_id:
-                return {
-                    'status': 'queued',
-                    'position': i + 1,
-                    'total': len(self.rag_queue)
-                }
+        return self.queues["rag"].status(user_id)
 
-        return {'status': 'not_in_queue'}
-    
     def can_start_transcribe(self) -> bool:
-        return self.transcribe_running is None and len(self.transcribe_queue) > 0
-    
+        return self.queues["transcribe"].can_start()
+
     def can_start_ai(self) -> bool:
-        return self.ai_running is None and len(self.ai_queue) > 0
+        return self.queues["ai"].can_start()
 
     def can_start_rag(self) -> bool:
-        return self.rag_running is None and len(self.rag_queue) > 0
+        return self.queues["rag"].can_start()
 
 # Global instance
 queue = ProcessQueue()
@@ -0,0 +1,62 @@
+import asyncio
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+from aiogram import types
+
+logger = logging.getLogger(__name__)
+
+
+class StatusUpdater:
+    """
+    Coalesces edits of a status message.
+
+    set() only remembers the text and sends it after min_interval; if another
+    set() arrives first, the pending text is replaced instead of sent, so quick
+    progress steps cost one Bot API call. flush() sends the final state now.
+    """
+
+    def __init__(self, message: types.Message, min_interval: float = 0.5):
+        self._message = message
+        self._min_interval = min_interval
+        self._pending: Optional[Tuple[str, Dict[str, Any]]] = None
+        self._last_text: Optional[str] = message.text
+        self._task: Optional[asyncio.Task] = None
+        # One edit at a time, so an older text can never land after a newer one
+        self._send_lock = asyncio.Lock()
+
+    async def set(self, text: str, **kwargs: Any) -> None:
+        """Schedule an edit (replaces any edit that has not been sent yet)"""
+        self._pending = (text, kwargs)
+        if self._task is None:
+            self._task = asyncio.create_task(self._delayed_flush())
+
+    async def flush(self, text: Optional[str] = None, **kwargs: Any) -> None:
+        """Send the pending (or given) text immediately"""
+        if text is not None:
+            self._pending = (text, kwargs)
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        await self._send()
+
+    async def _delayed_flush(self) -> None:
+        await asyncio.sleep(self._min_interval)
+        # Detach before sending so flush() never cancels an edit in flight
+        self._task = None
+        try:
+            await self._send()
+        except Exception as e:
+            logger.warning(f"Status update failed: {e}")
+
+    async def _send(self) -> None:
+        async with self._send_lock:
+            if self._pending is None:
+                return
+            text, kwargs = self._pending
+            self._pending = None
+            # Telegram rejects edits that do not change the text
+            if text == self._last_text:
+                return
+            await self._message.edit_text(text, **kwargs)
+            self._last_text = text
@@ -2,8 +2,9 @@
 Configuration management for SecBrain
 """
 import os
+from functools import cached_property
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Set, Tuple
 import json
 import logging
 
@@ -14,6 +15,11 @@ logger = logging.getLogger(__name__)
 class Config:
     """Управление конфигурацией с поддержкой переменных окружения"""
     
+    # Разобранные файлы конфигурации {путь: (mtime_ns, данные)} — общие для всех экземпляров
+    _file_cache: Dict[Path, Tuple[int, Dict[str, Any]]] = {}
+    # Директории, уже созданные в этом процессе
+    _created_dirs: Set[Path] = set()
+    
     def __init__(self, config_file: Path = None) -> None:
         """
         Загрузка конфигурации
@@ -28,7 +34,7 @@ class Config:
         # Base Data Directory
         # В Docker это будет /app/data, локально - ./data
         self.data_dir = Path(os.getenv('DATA_DIR', 'data'))
-        self.data_dir.mkdir(parents=True, exist_ok=True)
+        self._mkdir(self.data_dir)
         
         # Default Configuration
         self.defaults = {
@@ -40,6 +46,8 @@ class Config:
             # Models
             'whisper_model': 'base',
             'whisper_compute_type': 'int8',
+            'whisper_backend': 'ctranslate2',  # ctranslate2 (faster-whisper) или whispercpp
+            'whisper_quant': None,             # Квантизация whisper.cpp, например q4_k
             'ollama_base_url': 'http://localhost:11434', # URL для Ollama
             'ollama_model': 'mistral-nemo',
             'device': 'cpu',
@@ -61,8 +69,7 @@ class Config:
         self.data = self.defaults.copy()
         
         # Load from file
-        if self.config_file.exists():
-            self.load_from_file()
+        self.load_from_file()
             
         # Override with Environment Variables
         self.load_from_env()
@@ -71,13 +78,31 @@ class Config:
         self._ensure_dirs()
         
     def load_from_file(self) -> None:
-        """Загрузка из файла config.json"""
+        """
+        Загрузка из файла config.json
+        
+        Разобранный файл кэшируется по mtime: повторные Config() делают
+        один stat вместо открытия и разбора JSON.
+        """
         try:
-            with open(self.config_file, 'r', encoding='utf-8') as f:
-                user_config = json.load(f)
-                self.data.update(user_config)
-        except (json.JSONDecodeError, IOError) as e:
+            mtime_ns = self.config_file.stat().st_mtime_ns
+        except FileNotFoundError:
+            return
+        except OSError as e:
             logger.error(f"⚠️ Ошибка чтения конфига: {e}")
+            return
+        
+        key = self.config_file.resolve()
+        cached = self._file_cache.get(key)
+        if cached is None or cached[0] != mtime_ns:
+            try:
+                with open(self.config_file, 'r', encoding='utf-8') as f:
+                    cached = (mtime_ns, json.load(f))
+            except (json.JSONDecodeError, IOError) as e:
+                logger.error(f"⚠️ Ошибка чтения конфига: {e}")
+                return
+            self._file_cache[key] = cached
+        self.data.update(cached[1])
 
     def load_from_env(self) -> None:
         """Переопределение настроек из переменных окружения"""
@@ -86,6 +111,8 @@ class Config:
             'OUTPUT_DIR': 'output_dir',
             'TEMP_DIR': 'temp_dir',
             'WHISPER_MODEL': 'whisper_model',
+            'WHISPER_BACKEND': 'whisper_backend',
+            'WHISPER_QUANT': 'whisper_quant',
             'OLLAMA_HOST': 'ollama_base_url', # Standard Ollama env var is usually OLLAMA_HOST or OLLAMA_BASE_URL
             'OLLAMA_MODEL': 'ollama_model',
             'DEVICE': 'device',
@@ -108,9 +135,16 @@ class Config:
         for key in ['output_dir', 'temp_dir']:
             path = Path(self.data[key])
             try:
-                path.mkdir(parents=True, exist_ok=True)
+                self._mkdir(path)
             except Exception as e:
                 logger.error(f"Could not create directory {path}: {e}")
+    
+    @classmethod
+    def _mkdir(cls, path: Path) -> None:
+        """mkdir один раз за процесс для каждой директории"""
+        if path not in cls._created_dirs:
+            path.mkdir(parents=True, exist_ok=True)
+            cls._created_dirs.add(path)
 
     # --- Backward Compatibility APIs ---
     
@@ -120,12 +154,22 @@ class Config:
     def __getattr__(self, key: str):
         if key in self.data:
             return self.data[key]
-        # Specific getters for derived paths
-        if key == 'cookies_file':
-            return str(Path(self.data.get('config_dir', 'data/config')) / 'cookies.txt')
-        if key == 'session_file':
-            return str(Path(self.data.get('config_dir', 'data/config')) / 'session.json')
-        if key == 'tags_file':
-            return str(Path(self.data.get('config_dir', 'data/config')) / 'known_tags.json')
-            
         return object.__getattribute__(self, key)
+    
+    # Derived paths: computed once per instance (a key in config.json still wins)
+    def _config_path(self, key: str, filename: str) -> str:
+        if key in self.data:
+            return self.data[key]
+        return str(Path(self.data.get('config_dir', 'data/config')) / filename)
+    
+    @cached_property
+    def cookies_file(self) -> str:
+        return self._config_path('cookies_file', 'cookies.txt')
+    
+    @cached_property
+    def session_file(self) -> str:
+        return self._config_path('session_file', 'session.json')
+    
+    @cached_property
+    def tags_file(self) -> str:
+        return self._config_path('tags_file', 'known_tags.json')
@@ -5,18 +5,134 @@ SecBrain Download Script
 НЕ создаёт Knowledge.md - только сохраняет медиа, caption.md, transcript.md, comments.md.
 """
 
+import os
+import re
+import shutil
+import subprocess
 import sys
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
+from typing import List, Optional
 from rich.console import Console
 from rich.panel import Panel
 from rich.prompt import Prompt, Confirm
 
 from config import Config
+from modules.downloader_utils import sanitize_name
 from modules.hybrid_grabber import HybridGrabber
 from modules.local_ears import LocalEars
 
 console = Console()
 
+# Итоговые строки пакетного режима печатаются из нескольких потоков
+_print_lock = threading.Lock()
+
+# Воркеры пакетного режима по умолчанию (больше - риск лимитов Instagram)
+DEFAULT_DOWNLOAD_WORKERS = 5
+
+
+# Видео одного поста, транскрибируемые одновременно (больше - перегрузка CPU при int8)
+TRANSCRIBE_WORKERS = 2
+
+# Порог тишины: пик 0.01 от полной шкалы = -40 dBFS
+SILENCE_THRESHOLD_DB = -40.0
+# Проверяются только первые секунды: полный файл декодирует сам Whisper
+SILENCE_PROBE_SECONDS = 30
+_MAX_VOLUME_RE = re.compile(r"max_volume:\s*(-?[\d.]+|-inf) dB")
+
+# Разделитель транскрипций нескольких видео поста
+TRANSCRIPT_SEPARATOR = "\n\n---\n\n"
+
+
+# Один экземпляр LocalEars на процесс: в пакетном режиме потоки делят одну модель
+_EARS_SINGLETON: Optional[LocalEars] = None
+_ears_lock = threading.Lock()
+
+
+def _get_ears(config: Config) -> LocalEars:
+    """Возвращает общий экземпляр LocalEars (создается при первом вызове)"""
+    global _EARS_SINGLETON
+    with _ears_lock:
+        if _EARS_SINGLETON is None:
+            _EARS_SINGLETON = LocalEars(
+                model_size=config.get('whisper_model', 'base'),
+                device="cpu",
+                # Потоки делятся между воркерами, чтобы не превысить число ядер
+                num_threads=max(1, config.get('num_threads', 8) // TRANSCRIBE_WORKERS),
+                num_workers=TRANSCRIBE_WORKERS,
+                compute_type=config.get('whisper_compute_type', 'int8'),
+                backend=config.get('whisper_backend', 'ctranslate2'),
+                quant=config.get('whisper_quant')
+            )
+        return _EARS_SINGLETON
+
+
+def is_silent(media_path: Path, threshold_db: float = SILENCE_THRESHOLD_DB) -> bool:
+    """
+    Проверяет, что в файле нет слышимого звука (ffmpeg volumedetect)
+    
+    Декодирование начала аудиодорожки несравнимо дешевле прогона Whisper,
+    поэтому рекламные клипы и записи экрана без звука отсеиваются заранее.
+    Сравнивается пиковая громкость: короткая речь среди тишины
+    дает низкую среднюю громкость, но не пик.
+    
+    Args:
+        media_path: Видео/аудио файл
+        threshold_db: Порог пиковой громкости в dBFS
+        
+    Returns:
+        True если звуковой дорожки нет или в первых SILENCE_PROBE_SECONDS
+        секундах она тише порога. При ошибке ffmpeg - False
+        (транскрибация не пропускается).
+    """
+    try:
+        proc = subprocess.run(
+            ["ffmpeg", "-hide_banner", "-nostats", "-t", str(SILENCE_PROBE_SECONDS),
+             "-i", str(media_path), "-vn", "-af", "volumedetect", "-f", "null", "-"],
+            capture_output=True, text=True, timeout=120
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return False
+    
+    match = _MAX_VOLUME_RE.search(proc.stderr)
+    if match:
+        return float(match.group(1)) < threshold_db
+    # Нет аудиодорожки: выходной файл без потоков
+    return "does not contain any stream" in proc.stderr
+
+
+def _transcribe_one(ears: LocalEars, video_path: Path, batch_size: int):
+    """Транскрибирует одно видео в пакетном режиме LocalEars (тихие видео пропускаются)"""
+    if is_silent(video_path):
+        with _print_lock:
+            console.print(f"   🔇 {video_path.name}: нет звука, транскрибация пропущена")
+        return None
+    _, result = next(ears.transcribe_batch([video_path], batch_size=batch_size))
+    return result
+
+
+def transcribe_videos(ears: LocalEars, video_files: List[Path], batch_size: int = 8) -> list:
+    """
+    Транскрибирует все видео поста (карусели, несколько клипов) параллельно
+    
+    faster-whisper отпускает GIL во время инференса, поэтому декодирование
+    аудио одного клипа перекрывается с распознаванием другого.
+    
+    Args:
+        ears: Общий LocalEars
+        video_files: Видео поста
+        batch_size: Размер пакета фрагментов для BatchedInferencePipeline
+        
+    Returns:
+        Успешные TranscriptResult в порядке видео
+    """
+    workers = max(1, min(len(video_files), ears.max_concurrency))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(lambda path: _transcribe_one(ears, path, batch_size), video_files))
+    return [result for result in results if result]
+
 
 def print_banner():
     """Отображает баннер программы"""
@@ -29,6 +145,38 @@ def print_banner():
     console.print(Panel(banner, style="bold cyan"))
 
 
+# Буфер записи Markdown файлов: весь файл уходит одним write()
+_WRITE_BUFFER_SIZE = 1 << 17
+
+
+def _write_text(path: Path, text: str) -> None:
+    """Записывает текст одним вызовом через большой буфер"""
+    with path.open('w', encoding='utf-8', buffering=_WRITE_BUFFER_SIZE) as f:
+        f.write(text)
+
+
+def move_fast(src: Path, dst: Path, same_device: Optional[bool] = None) -> None:
+    """
+    Перемещает файл: rename на одном устройстве, shutil.move между разными
+    
+    Path.rename между файловыми системами (например, tmpfs -> диск) падает с EXDEV.
+    shutil.move копирует через copy2 (права и mtime сохраняются; на Linux
+    копирование в ядре) и удаляет исходный файл.
+    
+    Args:
+        src: Исходный файл
+        dst: Путь назначения
+        same_device: Результат сравнения st_dev, если уже известен
+    """
+    if same_device is None:
+        same_device = os.stat(src).st_dev == os.stat(dst.parent).st_dev
+    
+    if same_device:
+        os.rename(src, dst)
+    else:
+        shutil.move(src, dst)
+
+
 def save_raw_data(content, output_dir: Path):
     """
     Сохраняет сырые данные в структурированном виде
@@ -41,77 +189,100 @@ def save_raw_data(content, output_dir: Path):
     
     # Сохраняем caption
     if content.caption:
-        caption_file = output_dir / "caption.md"
-        caption_file.write_text(content.caption, encoding='utf-8')
+        _write_text(output_dir / "caption.md", content.caption)
         console.print(f"   ✅ Сохранён caption.md")
     
     # Сохраняем transcript
     if content.transcript:
-        transcript_file = output_dir / "transcript.md"
-        
-        transcript_md = f"# Транскрипция видео\n\n"
-        transcript_md += f"**Источник:** {content.url}\n"
-        transcript_md += f"**Автор:** {content.author}\n"
-        transcript_md += f"**Дата:** {content.date}\n\n"
-        transcript_md += "---\n\n"
-        transcript_md += "## С таймкодами\n\n"
-        transcript_md += content.transcript + "\n\n"
-        transcript_md += "---\n\n"
-        transcript_md += "## Чистый текст\n\n"
-        transcript_md += content.transcript_clean + "\n"
-        
-        transcript_file.write_text(transcript_md, encoding='utf-8')
+        parts = [
+            "# Транскрипция видео\n\n",
+            f"**Источник:** {content.url}\n",
+            f"**Автор:** {content.author}\n",
+            f"**Дата:** {content.date}\n\n",
+            "---\n\n",
+            "## С таймкодами\n\n",
+            content.transcript, "\n\n",
+            "---\n\n",
+            "## Чистый текст\n\n",
+            content.transcript_clean, "\n",
+        ]
+        _write_text(output_dir / "transcript.md", "".join(parts))
         console.print(f"   ✅ Сохранён transcript.md")
     
     # Комментарии НЕ сохраняем здесь - только через Playwright
 
 
-def safe_scrape_comments(url: str, output_dir: Path, config: Config) -> bool:
+def create_scraper(config: Config):
+    """
+    Создает и запускает скрапер комментариев (один браузер на сессию)
+    
+    Args:
+        config: Конфигурация
+        
+    Returns:
+        Запущенный SafeCommentsScraper или None, если Playwright недоступен
+    """
+    try:
+        from modules.safe_comments import SafeCommentsScraper
+    except ImportError:
+        console.print("   ⚠️  Playwright не установлен. Используйте: pip install playwright && playwright install chromium", style="yellow")
+        return None
+    
+    scraper = SafeCommentsScraper(
+        cookies_file=str(Path(config.get('cookies_file', 'instagram_cookies.json'))),
+        headless=config.get('headless_browser', True)
+    )
+    try:
+        scraper.start()
+    except Exception as e:
+        console.print(f"   ❌ Не удалось запустить браузер: {e}", style="red")
+        return None
+    return scraper
+
+
+def safe_scrape_comments(url: str, output_dir: Path, scraper, save_raw: bool = False) -> bool:
     """
     Безопасный скрапинг комментариев через Playwright
     
     Args:
         url: Instagram URL
         output_dir: Директория для сохранения
-        config: Конфигурация
+        scraper: Запущенный SafeCommentsScraper (см. create_scraper)
+        save_raw: Сохранить сырые перехваченные данные
         
     Returns:
         True если успешно
     """
     try:
-        from modules.safe_comments import SafeCommentsScraper
-        
-        console.print("\n🎭 Запуск безопасного скрапера комментариев...")
+        console.print("\n🎭 Безопасный скрапинг комментариев...")
         console.print("   ⚠️  Это займет 15-30 секунд...")
         
-        scraper = SafeCommentsScraper(
-            cookies_file=str(Path(config.get('cookies_file', 'instagram_cookies.json'))),
-            headless=config.get('headless_browser', True)
-        )
-        
         comments = scraper.scrape_comments(url, scroll_duration=15)
         
         if comments:
             # Сохраняем комментарии
-            comments_file = output_dir / "comments.md"
-            
-            comments_md = f"# Комментарии\n\n"
-            comments_md += f"**Пост:** {url}\n"
-            comments_md += f"**Всего комментариев:** {len(comments)}\n\n"
-            comments_md += "---\n\n"
+            # Части собираются в список: += в цикле копирует всю строку на каждом шаге
+            parts = [
+                "# Комментарии\n\n",
+                f"**Пост:** {url}\n",
+                f"**Всего комментариев:** {len(comments)}\n\n",
+                "---\n\n",
+            ]
             
             for i, comment in enumerate(comments, 1):
-                comments_md += f"### Комментарий {i}\n\n"
-                comments_md += f"**Автор:** {comment.get('user', 'Unknown')}\n"
-                comments_md += f"**Лайков:** {comment.get('likes', 0)}\n\n"
-                comments_md += f"{comment.get('text', '')}\n\n"
-                comments_md += "---\n\n"
+                parts.append(
+                    f"### Комментарий {i}\n\n"
+                    f"**Автор:** {comment.get('user', 'Unknown')}\n"
+                    f"**Лайков:** {comment.get('likes', 0)}\n\n"
+                    f"{comment.get('text', '')}\n\n"
+                    "---\n\n"
+                )
             
-            comments_file.write_text(comments_md, encoding='utf-8')
+            _write_text(output_dir / "comments.md", "".join(parts))
             console.print(f"   ✅ Сохранены comments.md ({len(comments)} комментариев)")
             
             # Сохраняем сырые данные
-            if config.get('save_raw_comments', False):
+            if save_raw:
                 scraper.save_raw_data(str(output_dir / "raw_comments.json"))
             
             return True
@@ -119,21 +290,19 @@ def safe_scrape_comments(url: str, output_dir: Path, config: Config) -> bool:
             console.print("   ⚠️  Комментарии не найдены", style="yellow")
             return False
             
-    except ImportError:
-        console.print("   ⚠️  Playwright не установлен. Используйте: pip install playwright && playwright install chromium", style="yellow")
-        return False
     except Exception as e:
         console.print(f"   ❌ Ошибка скрапинга: {e}", style="red")
         return False
 
 
-def download_content(url: str, config: Config, scrape_comments_safe: bool = False):
+def download_content(url: str, config: Config, scraper=None):
     """
     Скачивает контент и подготавливает сырые данные
     
     Args:
         url: Instagram URL
         config: Конфигурация
+        scraper: Запущенный SafeCommentsScraper, если нужны комментарии
         
     Returns:
         Path к созданной директории или None при ошибке
@@ -142,17 +311,21 @@ def download_content(url: str, config: Config, scrape_comments_safe: bool = Fals
     console.print(f"🚀 Обработка: {url}")
     console.print("=" * 60 + "\n")
     
+    # Своя временная папка на каждую ссылку: HybridGrabber собирает все медиа
+    # из output_dir и пишет фиксированные имена (media.*),
+    # поэтому в пакетном режиме общая temp_dir смешала бы посты
+    temp_root = Path(config.temp_dir)
+    temp_root.mkdir(parents=True, exist_ok=True)
+    scratch_dir = Path(tempfile.mkdtemp(prefix="grab_", dir=temp_root))
+    
     # Инициализация модулей
     grabber = HybridGrabber(
-        output_dir=Path(config.temp_dir),
-        cookies_file=Path(config.get('cookies_file', 'instagram_cookies.txt'))
-    )
-    ears = LocalEars(
-        model_size=config.get('whisper_model', 'base'),
-        device="cpu",
-        num_threads=config.get('num_threads', 8),
-        compute_type=config.get('whisper_compute_type', 'int8')
+        output_dir=scratch_dir,
+        cookies_file=Path(config.get('cookies_file', 'instagram_cookies.txt')),
+        # Папка удаляется после загрузки, кэш отпечатков в ней бесполезен
+        fingerprint_cache=False
     )
+    ears = _get_ears(config)
     
     try:
         # 1. Скачивание контента через gallery-dl
@@ -171,16 +344,13 @@ def download_content(url: str, config: Config, scrape_comments_safe: bool = Fals
             console.print("🎤 Транскрибация аудиодорожки...")
             console.print("   ⏳ Обработка...")
             
-            for video_path in video_files:
-                result = ears.transcribe(video_path)
-                if result:
-                    content.transcript = result.timed_transcript
-                    content.transcript_clean = result.full_text
-                    
-                    # Подсчитываем количество сегментов
-                    segments = len([line for line in result.timed_transcript.split('\n') if line.strip().startswith('[')])
-                    console.print(f"   ✅ Транскрибация завершена ({segments} сегментов)")
-                    break
+            results = transcribe_videos(ears, video_files, config.get('whisper_batch_size', 8))
+            if results:
+                content.transcript = TRANSCRIPT_SEPARATOR.join(r.timed_transcript for r in results)
+                content.transcript_clean = TRANSCRIPT_SEPARATOR.join(r.full_text for r in results)
+                
+                segments = sum(r.segment_count for r in results)
+                console.print(f"   ✅ Транскрибация завершена ({len(results)} видео, {segments} сегментов)")
             
             if not content.transcript:
                 console.print("   ⚠️  Транскрибация не удалась", style="yellow")
@@ -192,13 +362,18 @@ def download_content(url: str, config: Config, scrape_comments_safe: bool = Fals
         
         folder_name = f"{date_prefix}_{author}_{title}"
         # Очистка имени от недопустимых символов
-        folder_name = "".join(c if c.isalnum() or c in "._- " else "_" for c in folder_name)
+        folder_name = sanitize_name(folder_name)
         
         output_dir = Path(config.output_dir) / folder_name
         output_dir.mkdir(parents=True, exist_ok=True)
         
         # 4. Перемещение медиа-файлов
         console.print(f"📁 Перемещение файлов в: {folder_name}")
+        # Все медиа лежат в temp_dir: устройство проверяем один раз на пост
+        same_device = (
+            os.stat(content.media_paths[0]).st_dev == os.stat(output_dir).st_dev
+            if content.media_paths else True
+        )
         for i, media_path in enumerate(content.media_paths, 1):
             if i == 1:
                 new_name = f"media{media_path.suffix}"
@@ -206,7 +381,7 @@ def download_content(url: str, config: Config, scrape_comments_safe: bool = Fals
                 new_name = f"media_{i}{media_path.suffix}"
             
             dest_path = output_dir / new_name
-            media_path.rename(dest_path)
+            move_fast(media_path, dest_path, same_device)
             console.print(f"   ✅ {new_name}")
         
         # 5. Сохранение сырых данных
@@ -214,8 +389,8 @@ def download_content(url: str, config: Config, scrape_comments_safe: bool = Fals
         save_raw_data(content, output_dir)
         
         # 6. Опционально: Безопасный скрапинг комментариев через Playwright
-        if scrape_comments_safe:
-            safe_scrape_comments(url, output_dir, config)
+        if scraper is not None:
+            safe_scrape_comments(url, output_dir, scraper, save_raw=config.get('save_raw_comments', False))
         
         console.print("\n" + "=" * 60)
         console.print(f"✅ Данные подготовлены: {output_dir}")
@@ -226,10 +401,100 @@ def download_content(url: str, config: Config, scrape_comments_safe: bool = Fals
     except Exception as e:
         console.print(f"❌ Ошибка: {e}", style="red")
         return None
+    finally:
+        # Медиа уже перенесены в output_dir; остатки загрузки не нужны
+        shutil.rmtree(scratch_dir, ignore_errors=True)
 
 
-def main():
+def process_url(url: str, config: Config, use_safe_scraper: bool, scraper=None) -> Optional[Path]:
+    """
+    Скачивание и подготовка данных по одной ссылке
+    
+    Args:
+        url: Instagram URL
+        config: Конфигурация
+        use_safe_scraper: Скачивать комментарии через Playwright
+        scraper: Общий запущенный скрапер; без него браузер запускается на эту ссылку
+        
+    Returns:
+        Path к созданной директории или None при ошибке
+    """
+    owns_scraper = use_safe_scraper and scraper is None
+    if owns_scraper:
+        # Браузер Playwright привязан к потоку, поэтому в пакетном режиме он свой у каждой ссылки
+        scraper = create_scraper(config)
+    
+    try:
+        output_dir = download_content(url, config, scraper=scraper if use_safe_scraper else None)
+    finally:
+        if owns_scraper and scraper is not None:
+            scraper.stop()
+    
+    if output_dir:
+        with _print_lock:
+            console.print(f"✨ Данные готовы к обработке: {output_dir}\n")
+    return output_dir
+
+
+def run_batch(batch_file: Path, config: Config, use_safe_scraper: bool) -> None:
+    """
+    Пакетный режим: ссылки из файла скачиваются параллельно
+    
+    Загрузка (gallery-dl, Playwright) упирается в сеть, поэтому потоки
+    перекрывают ожидание разных ссылок.
+    
+    Args:
+        batch_file: Файл со ссылками (по одной на строку)
+        config: Конфигурация
+        use_safe_scraper: Скачивать комментарии через Playwright
+    """
+    urls = [
+        line.strip() for line in batch_file.read_text(encoding='utf-8').splitlines()
+        if line.strip().startswith('http')
+    ]
+    if not urls:
+        console.print(f"⚠️  В файле {batch_file} нет ссылок", style="yellow")
+        return
+    
+    workers = config.get('download_workers', DEFAULT_DOWNLOAD_WORKERS)
+    console.print(f"📋 Ссылок: {len(urls)}, потоков: {workers}\n")
+    
+    succeeded = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(process_url, url, config, use_safe_scraper): url for url in urls}
+        for future in as_completed(futures):
+            url = futures[future]
+            try:
+                output_dir = future.result()
+            except Exception as e:
+                output_dir = None
+                with _print_lock:
+                    console.print(f"❌ {url}: {e}", style="red")
+            if output_dir:
+                succeeded += 1
+    
+    console.print(f"\n✅ Готово: {succeeded}/{len(urls)}")
+
+
+def main(argv=None):
     """Главная функция"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(
+        description="SecBrain: скачивание контента и подготовка данных"
+    )
+    parser.add_argument(
+        '--batch',
+        type=Path,
+        help='Файл со ссылками (по одной на строку) для пакетной загрузки'
+    )
+    parser.add_argument(
+        '--comments',
+        action='store_true',
+        help='Скачивать комментарии через Playwright (в пакетном режиме)'
+    )
+    args = parser.parse_args(argv)
+    
     print_banner()
     
     # Загрузка конфигурации
@@ -239,6 +504,10 @@ def main():
     console.print(f"🎙️  Whisper Model: {config.whisper_model}")
     console.print(f"🔧 CPU Threads: {config.num_threads}\n")
     
+    if args.batch:
+        run_batch(args.batch, config, use_safe_scraper=args.comments)
+        return
+    
     # Спрашиваем, нужен ли скрапинг комментариев через Playwright
     use_safe_scraper = Confirm.ask(
         "💬 Скачивать комментарии через Playwright?",
@@ -250,7 +519,17 @@ def main():
     else:
         console.print("⚠️  Комментарии НЕ будут скачаны\n", style="yellow")
     
-    # Основной цикл
+    # Один браузер на всю сессию: для каждой ссылки только новый контекст
+    scraper = create_scraper(config) if use_safe_scraper else None
+    try:
+        repl_loop(config, scraper)
+    finally:
+        if scraper is not None:
+            scraper.stop()
+
+
+def repl_loop(config: Config, scraper) -> None:
+    """Интерактивный ввод ссылок до 'quit' (комментарии - если передан scraper)"""
     while True:
         console.print("─" * 60)
         url = Prompt.ask(
@@ -267,10 +546,7 @@ def main():
             continue
         
         # Скачивание и подготовка данных
-        output_dir = download_content(url, config, scrape_comments_safe=use_safe_scraper)
-        
-        if output_dir:
-            console.print(f"✨ Данные готовы к обработке: {output_dir}\n")
+        process_url(url, config, scraper is not None, scraper)
 
 
 if __name__ == "__main__":
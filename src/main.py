@@ -1,7 +1,15 @@
 """
 SecBrain - Instagram Content to Knowledge Base CLI
 """
+import importlib.util
+import json
+import os
+import shutil
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
 from pathlib import Path
+from typing import Dict, List, Tuple
 from rich.console import Console
 from rich.prompt import Prompt
 from rich.panel import Panel
@@ -11,6 +19,9 @@ from modules.pipeline import SecBrainPipeline
 
 console = Console()
 
+# Успешные проверки внешних команд: {путь к исполняемому файлу: mtime_ns}
+PREREQ_CACHE_FILE = Path.home() / ".cache" / "secbrain" / "prereq.json"
+
 
 def display_banner() -> None:
     """Отображение welcome banner"""
@@ -23,52 +34,123 @@ def display_banner() -> None:
     console.print(Panel(banner, style="bold cyan"))
 
 
-def check_prerequisites() -> bool:
-    """Проверка необходимых зависимостей"""
-    issues = []
+@lru_cache(maxsize=None)
+def _check_package(module: str, name: str, install_hint: str) -> Tuple[bool, str]:
+    """
+    Проверяет, что Python пакет установлен
     
-    # Проверка Ollama
-    try:
-        import ollama
-        console.print("✅ Ollama library installed", style="green")
-    except ImportError:
-        issues.append("❌ Ollama не установлен: pip install ollama")
+    Ищет модуль через find_spec, не импортируя его: импорт faster_whisper
+    и ollama занимает секунды, а пакеты все равно грузятся при первом использовании.
     
-    # Проверка faster-whisper
-    try:
-        import faster_whisper
-        console.print("✅ faster-whisper installed", style="green")
-    except ImportError:
-        issues.append("❌ faster-whisper не установлен: pip install faster-whisper")
+    Returns:
+        Кортеж (успех, сообщение)
+    """
+    if importlib.util.find_spec(module) is not None:
+        return True, f"✅ {name} installed"
+    return False, f"❌ {install_hint}"
+
+
+def _check_command(cmd: List[str], name: str, missing_msg: str) -> Tuple[bool, str]:
+    """
+    Проверяет, что внешняя команда запускается
     
-    # Проверка yt-dlp
-    import subprocess
+    Returns:
+        Кортеж (успех, сообщение)
+    """
     try:
-        result = subprocess.run(
-            ['yt-dlp', '--version'], 
-            capture_output=True, 
-            check=True,
-            timeout=5
-        )
-        console.print("✅ yt-dlp found", style="green")
+        subprocess.run(cmd, capture_output=True, check=True, timeout=5)
+        return True, f"✅ {name} found"
     except subprocess.TimeoutExpired:
-        issues.append("❌ yt-dlp не отвечает (timeout)")
+        return False, f"❌ {name} не отвечает (timeout)"
     except (subprocess.CalledProcessError, FileNotFoundError):
-        issues.append("❌ yt-dlp не установлен: pip install yt-dlp")
+        return False, f"❌ {missing_msg}"
+
+
+def _load_prereq_cache() -> Dict[str, int]:
+    """Читает кэш проверок внешних команд (пустой при любой ошибке)"""
+    try:
+        with open(PREREQ_CACHE_FILE, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return cache if isinstance(cache, dict) else {}
+
+
+def _save_prereq_cache(cache: Dict[str, int]) -> None:
+    """Сохраняет кэш проверок внешних команд"""
+    try:
+        PREREQ_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        with open(PREREQ_CACHE_FILE, 'w', encoding='utf-8') as f:
+            json.dump(cache, f)
+    except OSError:
+        pass
+
+
+def _check_command_cached(
+    cmd: List[str],
+    name: str,
+    missing_msg: str,
+    cache: Dict[str, int]
+) -> Tuple[bool, str]:
+    """
+    _check_command с кэшем по пути и mtime исполняемого файла
+    
+    Если тот же файл уже успешно запускался, процесс не стартует
+    (fork+exec yt-dlp - сотни миллисекунд). Новый результат
+    записывается в cache.
+    
+    Returns:
+        Кортеж (успех, сообщение)
+    """
+    executable = shutil.which(cmd[0])
+    if executable is None:
+        return False, f"❌ {missing_msg}"
     
-    # Проверка FFmpeg
     try:
-        result = subprocess.run(
-            ['ffmpeg', '-version'], 
-            capture_output=True, 
-            check=True,
-            timeout=5
-        )
-        console.print("✅ FFmpeg found", style="green")
-    except subprocess.TimeoutExpired:
-        issues.append("❌ FFmpeg не отвечает (timeout)")
-    except (subprocess.CalledProcessError, FileNotFoundError):
-        issues.append("❌ FFmpeg не установлен")
+        mtime_ns = os.stat(executable).st_mtime_ns
+    except OSError:
+        return _check_command(cmd, name, missing_msg)
+    
+    if cache.get(executable) == mtime_ns:
+        return True, f"✅ {name} found"
+    
+    ok, message = _check_command(cmd, name, missing_msg)
+    if ok:
+        cache[executable] = mtime_ns
+    return ok, message
+
+
+def check_prerequisites() -> bool:
+    """
+    Проверка необходимых зависимостей
+    
+    Проверки независимы и ждут в основном импорта/запуска процессов,
+    поэтому выполняются параллельно; вывод - в фиксированном порядке.
+    """
+    cache = _load_prereq_cache()
+    cached_before = dict(cache)
+    
+    probes = [
+        partial(_check_package, "ollama", "Ollama library", "Ollama не установлен: pip install ollama"),
+        partial(_check_package, "faster_whisper", "faster-whisper",
+                "faster-whisper не установлен: pip install faster-whisper"),
+        partial(_check_command_cached, ["yt-dlp", "--version"], "yt-dlp",
+                "yt-dlp не установлен: pip install yt-dlp", cache),
+        partial(_check_command_cached, ["ffmpeg", "-version"], "FFmpeg", "FFmpeg не установлен", cache),
+    ]
+    
+    with ThreadPoolExecutor(max_workers=len(probes)) as executor:
+        results = list(executor.map(lambda probe: probe(), probes))
+    
+    if cache != cached_before:
+        _save_prereq_cache(cache)
+    
+    issues = []
+    for ok, message in results:
+        if ok:
+            console.print(message, style="green")
+        else:
+            issues.append(message)
     
     if issues:
         console.print("\n[bold red]Проблемы с зависимостями:[/bold red]")
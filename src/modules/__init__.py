@@ -6,6 +6,8 @@ SecBrain modules - Modular Architecture
 - Legacy: content_downloader (монолитный, устарел)
 """
 
+import importlib
+
 # ============================================================================
 # НОВАЯ МОДУЛЬНАЯ АРХИТЕКТУРА (RECOMMENDED)
 # ============================================================================
@@ -26,6 +28,7 @@ from .downloader_base import (
 # Утилиты
 from .downloader_utils import (
     clean_filename,
+    sanitize_name,
     extract_video_id_youtube,
     extract_shortcode_instagram,
     is_youtube_short,
@@ -36,32 +39,46 @@ from .downloader_utils import (
     print_progress
 )
 
-# Скачиватели
-from .instagram_post_downloader import InstagramPostDownloader
-from .instagram_reels_downloader import InstagramReelsDownloader
-from .youtube_video_downloader import YouTubeVideoDownloader
-from .youtube_shorts_downloader import YouTubeShortsDownloader
-from .youtube_comment_service import YouTubeCommentService
-
-# Роутер (главный интерфейс)
-from .content_router import ContentRouter
+# Остальные модули тянут yt_dlp, faster_whisper, ollama, playwright и т.д.,
+# поэтому импортируются при первом обращении (PEP 562): {имя: модуль}
+_LAZY_IMPORTS = {
+    # Скачиватели
+    'InstagramPostDownloader': '.instagram_post_downloader',
+    'InstagramReelsDownloader': '.instagram_reels_downloader',
+    'YouTubeVideoDownloader': '.youtube_video_downloader',
+    'YouTubeShortsDownloader': '.youtube_shorts_downloader',
+    'YouTubeCommentService': '.youtube_comment_service',
+    
+    # Роутер (главный интерфейс)
+    'ContentRouter': '.content_router',
+    
+    # YouTube grabber с обходом блокировок
+    'ProductionYouTubeGrabber': '.youtube_grabber_v2',
+    
+    # ========================================================================
+    # LEGACY (для обратной совместимости)
+    # ========================================================================
+    'ContentDownloader': '.content_downloader',
+    'ContentInfo': '.content_downloader',
+    'HybridGrabber': '.hybrid_grabber',
+    'LocalEars': '.local_ears',
+    'LocalBrain': '.local_brain',
+    'TagManager': '.tag_manager',
+}
 
-# YouTube grabber с обходом блокировок
-from .youtube_grabber_v2 import ProductionYouTubeGrabber
 
+def __getattr__(name: str):
+    module_name = _LAZY_IMPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    # Следующие обращения идут мимо __getattr__
+    globals()[name] = value
+    return value
 
-# ============================================================================
-# LEGACY (для обратной совместимости)
-# ============================================================================
 
-from .content_downloader import (
-    ContentDownloader,
-    ContentInfo,
-)
-from .hybrid_grabber import HybridGrabber
-from .local_ears import LocalEars
-from .local_brain import LocalBrain
-from .tag_manager import TagManager
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_IMPORTS))
 
 __all__ = [
     # ========== НОВАЯ АРХИТЕКТУРА (используйте это) ==========
@@ -79,6 +96,7 @@ __all__ = [
     
     # Утилиты
     'clean_filename',
+    'sanitize_name',
     'extract_video_id_youtube',
     'extract_shortcode_instagram',
     'is_youtube_short',
@@ -8,6 +8,13 @@ from pathlib import Path
 from typing import Optional
 
 
+# Символы, недопустимые в именах файлов (удаляются одним str.translate)
+_INVALID_CHARS_TABLE = str.maketrans('', '', '<>:"/\\|?*')
+
+# Все, кроме букв/цифр (любого алфавита) и "._- "; \w = isalnum() или "_"
+_UNSAFE_NAME_CHARS_RE = re.compile(r'[^\w.\- ]')
+
+
 def clean_filename(filename: str, max_length: int = 100) -> str:
     """
     Очищает имя файла от недопустимых символов
@@ -20,7 +27,7 @@ def clean_filename(filename: str, max_length: int = 100) -> str:
         Очищенное имя
     """
     # Убираем недопустимые символы
-    filename = re.sub(r'[<>:"/\\|?*]', '', filename)
+    filename = filename.translate(_INVALID_CHARS_TABLE)
     
     # Заменяем множественные пробелы на один
     filename = re.sub(r'\s+', ' ', filename)
@@ -42,6 +49,22 @@ def clean_filename(filename: str, max_length: int = 100) -> str:
     return filename
 
 
+def sanitize_name(name: str) -> str:
+    """
+    Заменяет на "_" все символы, кроме букв, цифр и "._- "
+    
+    Один проход скомпилированного регулярного выражения вместо
+    генератора с isalnum() на каждый символ.
+    
+    Args:
+        name: Исходное имя
+        
+    Returns:
+        Имя, безопасное для папки
+    """
+    return _UNSAFE_NAME_CHARS_RE.sub('_', name)
+
+
 def extract_video_id_youtube(url: str) -> Optional[str]:
     """
     Извлекает video ID из YouTube URL
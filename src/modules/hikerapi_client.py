@@ -9,6 +9,7 @@ import logging
 from typing import Optional, Dict, Any, List
 from dataclasses import dataclass
 import requests
+from requests.adapters import HTTPAdapter
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
@@ -60,16 +61,30 @@ class HikerAPIClient:
             "x-access-key": self.api_key,
         }
         self.timeout = 30
+        
+        # Keep-alive: переиспользуем TCP/TLS соединения между запросами
+        self.session = self._create_session()
+        self.session.headers.update(self.headers)
+        # Отдельная сессия для CDN, чтобы не отправлять туда API ключ
+        self.media_session = self._create_session()
+    
+    @staticmethod
+    def _create_session() -> requests.Session:
+        """Создает сессию с пулом соединений"""
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=8, pool_maxsize=32)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
     
     def _request(self, endpoint: str, params: Optional[Dict] = None) -> Optional[Dict]:
         """Выполняет GET запрос к API"""
         url = f"{self.base_url}{endpoint}"
         
         try:
-            response = requests.get(
+            response = self.session.get(
                 url,
                 params=params,
-                headers=self.headers,
                 timeout=self.timeout
             )
             response.raise_for_status()
@@ -182,7 +197,7 @@ class HikerAPIClient:
             True если успешно
         """
         try:
-            response = requests.get(url, timeout=60, stream=True)
+            response = self.media_session.get(url, timeout=60, stream=True)
             response.raise_for_status()
             
             save_path.parent.mkdir(parents=True, exist_ok=True)
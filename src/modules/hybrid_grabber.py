@@ -1,7 +1,10 @@
 """
 HybridGrabber - Парсинг Instagram через yt-dlp + gallery-dl
 """
+import mmap
+import os
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, Optional, List, Tuple
 from dataclasses import dataclass
@@ -10,6 +13,104 @@ import json
 import shutil
 import hashlib
 
+try:
+    from hashlib import file_digest  # Python 3.11+
+except ImportError:  # pragma: no cover - старые версии Python
+    file_digest = None
+
+try:
+    import blake3  # Опционально: SIMD (AVX2/AVX-512/NEON) и многопоточность
+except ImportError:
+    blake3 = None
+
+# Размер буфера для fallback-чтения при хешировании
+_HASH_CHUNK_SIZE = 1 << 20
+# Размер начального/конечного блока для быстрой сигнатуры
+_QUICK_SIGNATURE_SIZE = 64 * 1024
+# Расширения медиа файлов, которые собираются после gallery-dl
+_MEDIA_SUFFIXES = frozenset({'.mp4', '.jpg', '.png', '.webp', '.jpeg'})
+# Файл кэша отпечатков {путь|размер|mtime_ns: хеш} внутри output_dir
+_FINGERPRINT_CACHE_NAME = '.dedup_cache.json'
+# Алгоритм отпечатка (хранится в кэше: хеши разных алгоритмов несравнимы)
+_FINGERPRINT_ALGORITHM = 'blake3' if blake3 is not None else 'blake2b-128'
+
+
+def _new_fingerprint_hash():
+    """
+    Хеш для дедупликации
+    
+    Если установлен пакет blake3, используется BLAKE3: векторизованная
+    реализация (AVX2/AVX-512/NEON выбираются во время выполнения) и
+    многопоточное хеширование больших буферов. Иначе - BLAKE2b (128 бит)
+    из стандартной библиотеки, который быстрее MD5 на 64-битных CPU.
+    """
+    if blake3 is not None:
+        return blake3.blake3(max_threads=blake3.blake3.AUTO)
+    return hashlib.blake2b(digest_size=16)
+
+
+def _calculate_fingerprint(file_path: Path) -> str:
+    """
+    Вычисляет отпечаток содержимого файла для дедупликации
+    
+    Используется BLAKE3 (если установлен) или BLAKE2b из стандартной
+    библиотеки: криптостойкость для локальной дедупликации не нужна,
+    а оба быстрее MD5 на 64-битных CPU.
+    Файлы больше 1 MiB отображаются в память через mmap и хешируются
+    одним вызовом update() прямо из page cache, без копирования блоков.
+    Небольшие файлы (и случаи, когда mmap недоступен) читаются через
+    hashlib.file_digest, на старых версиях Python - блоками по 1 MiB.
+    
+    Args:
+        file_path: Путь к файлу
+        
+    Returns:
+        Hex-строка отпечатка
+    """
+    with open(file_path, 'rb', buffering=0) as f:
+        if os.fstat(f.fileno()).st_size > _HASH_CHUNK_SIZE:
+            try:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    if hasattr(mm, 'madvise') and hasattr(mmap, 'MADV_SEQUENTIAL'):
+                        mm.madvise(mmap.MADV_SEQUENTIAL)
+                    fingerprint = _new_fingerprint_hash()
+                    fingerprint.update(mm)
+                    return fingerprint.hexdigest()
+            except (OSError, ValueError, OverflowError):
+                pass  # Нет адресного пространства или mmap не поддерживается - читаем потоком
+        
+        if file_digest is not None:
+            return file_digest(f, _new_fingerprint_hash).hexdigest()
+        
+        fingerprint = _new_fingerprint_hash()
+        for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b''):
+            fingerprint.update(chunk)
+        return fingerprint.hexdigest()
+
+
+def _quick_signature(file_path: Path, size: int) -> bytes:
+    """
+    Быстрая сигнатура файла: первые 64 KiB и, для файлов больше 1 MiB, последние 64 KiB
+    
+    Файлы одного размера с разной сигнатурой заведомо различны,
+    и полный хеш для них не нужен.
+    
+    Args:
+        file_path: Путь к файлу
+        size: Размер файла в байтах
+        
+    Returns:
+        Байты начала (и конца) файла
+    """
+    fd = os.open(file_path, os.O_RDONLY)
+    try:
+        head = os.pread(fd, _QUICK_SIGNATURE_SIZE, 0)
+        if size <= _HASH_CHUNK_SIZE:
+            return head
+        return head + os.pread(fd, _QUICK_SIGNATURE_SIZE, size - _QUICK_SIGNATURE_SIZE)
+    finally:
+        os.close(fd)
+
 
 @dataclass
 class InstagramContent:
@@ -37,18 +138,32 @@ class InstagramContent:
 class HybridGrabber:
     """Гибридный парсер Instagram контента"""
     
-    def __init__(self, output_dir: Path, cookies_file: Path = None) -> None:
+    def __init__(
+        self,
+        output_dir: Path,
+        cookies_file: Path = None,
+        hash_workers: Optional[int] = None,
+        fingerprint_cache: bool = True
+    ) -> None:
         """
         Инициализация grabber
         
         Args:
             output_dir: Директория для сохранения медиа
             cookies_file: Путь к cookies.txt для gallery-dl и yt-dlp
+            hash_workers: Количество потоков для хеширования при дедупликации
+                          (1 = последовательно, по умолчанию min(8, CPU))
+            fingerprint_cache: Хранить отпечатки в output_dir/.dedup_cache.json
+                               (False для временной output_dir, которая удаляется
+                               после загрузки: кэш там всегда пуст)
         """
         self.output_dir = output_dir
         self.cookies_file = cookies_file
         self.last_request_time = 0
         self.min_delay = 3.0  # Минимальная задержка между запросами (секунды)
+        self.hash_workers = hash_workers or min(8, os.cpu_count() or 1)
+        self.use_fingerprint_cache = fingerprint_cache
+        self._fingerprint_cache: Optional[Dict[str, str]] = None
     
     def setup_instagrapi(self, session_file: Path) -> None:
         """
@@ -207,6 +322,203 @@ class HybridGrabber:
             print(f"❌ Ошибка yt-dlp: {e.stderr}")
             return None, None
     
+    def _collect_media_files(self) -> Dict[Path, int]:
+        """
+        Рекурсивно собирает медиа файлы из output_dir
+        
+        Обход через os.scandir: тип и размер файла берутся из DirEntry
+        без отдельного stat() и Path на каждую запись.
+        
+        Returns:
+            Словарь {путь: размер в байтах}, отсортированный по пути
+        """
+        found: List[Tuple[Path, int]] = []
+        pending = [self.output_dir]
+        while pending:
+            with os.scandir(pending.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        pending.append(entry.path)
+                    elif entry.is_file() and os.path.splitext(entry.name)[1] in _MEDIA_SUFFIXES:
+                        found.append((Path(entry.path), entry.stat().st_size))
+        
+        return dict(sorted(found))
+    
+    def _deduplicate_media(
+        self,
+        media_files: List[Path],
+        file_sizes: Optional[Dict[Path, int]] = None
+    ) -> List[Path]:
+        """
+        Удаляет дубликаты медиа файлов по содержимому
+        
+        Файлы сначала группируются по размеру: файл с уникальным размером
+        не может иметь дубликата. Внутри групп одного размера сравниваются
+        начало и конец файла, и полный хеш считается только для файлов,
+        совпавших по этой сигнатуре.
+        
+        Args:
+            media_files: Список файлов (порядок сохраняется)
+            file_sizes: Уже известные размеры файлов (иначе stat())
+            
+        Returns:
+            Список уникальных файлов
+        """
+        file_sizes = file_sizes or {}
+        size_to_files: Dict[int, List[Path]] = {}
+        for file in media_files:
+            size = file_sizes.get(file)
+            if size is None:
+                size = file.stat().st_size
+            size_to_files.setdefault(size, []).append(file)
+        
+        # Внутри групп одного размера сравниваем быструю сигнатуру
+        # (чтения для всех групп выполняются одним пакетом)
+        size_groups = [(size, files) for size, files in size_to_files.items() if len(files) > 1]
+        signatures = self._read_signatures(
+            [(file, size) for size, same_size in size_groups for file in same_size]
+        )
+        
+        candidate_groups: List[List[Path]] = []
+        for size, same_size in size_groups:
+            by_signature: Dict[bytes, List[Path]] = {}
+            for file in same_size:
+                by_signature.setdefault(signatures[file], []).append(file)
+            candidate_groups.extend(group for group in by_signature.values() if len(group) > 1)
+        
+        # Полный хеш - только для совпавших по сигнатуре
+        candidates = [file for group in candidate_groups for file in group]
+        hashes = dict(zip(candidates, self._hash_files(candidates)))
+        
+        duplicates = set()
+        report = []
+        for group in candidate_groups:
+            seen_hashes = set()
+            for file in group:
+                file_hash = hashes[file]
+                
+                # Проверяем, не встречали ли мы этот хеш ранее
+                if file_hash in seen_hashes:
+                    duplicates.add(file)
+                    report.append(f"⚠️  Пропущен дубликат: {file.name} (хеш: {file_hash[:8]}...)")
+                else:
+                    seen_hashes.add(file_hash)
+        
+        if report:
+            print("\n".join(report))
+        
+        return [file for file in media_files if file not in duplicates]
+    
+    def _read_signatures(self, files: List[Tuple[Path, int]]) -> Dict[Path, bytes]:
+        """
+        Читает быстрые сигнатуры всех кандидатов одним пакетом
+        
+        Чтения выполняются параллельно в пуле потоков, так что диск
+        получает сразу несколько запросов вместо последовательных pread().
+        
+        Args:
+            files: Список пар (файл, размер)
+            
+        Returns:
+            Словарь {файл: сигнатура}
+        """
+        if self.hash_workers <= 1 or len(files) < 2:
+            return {file: _quick_signature(file, size) for file, size in files}
+        
+        with ThreadPoolExecutor(max_workers=min(self.hash_workers, len(files))) as executor:
+            signatures = executor.map(lambda item: _quick_signature(*item), files)
+            return {file: signature for (file, _), signature in zip(files, signatures)}
+    
+    def _hash_files(self, files: List[Path]) -> List[str]:
+        """
+        Хеширует файлы параллельно в пуле потоков
+        
+        hashlib отпускает GIL при чтении и хешировании больших блоков,
+        поэтому потоки дают реальный параллелизм без накладных расходов
+        на запуск процессов. Отпечатки неизменившихся файлов
+        (тот же путь, размер и mtime_ns) берутся из кэша на диске.
+        
+        Args:
+            files: Список файлов
+            
+        Returns:
+            Список хешей в том же порядке
+        """
+        if not files:
+            return []
+        
+        if not self.use_fingerprint_cache:
+            return self._calculate_fingerprints(files)
+        
+        cache = self._load_fingerprint_cache()
+        keys = [self._fingerprint_cache_key(file) for file in files]
+        missing = [file for file, key in zip(files, keys) if key not in cache]
+        
+        computed = self._calculate_fingerprints(missing)
+        
+        if missing:
+            for file, file_hash in zip(missing, computed):
+                cache[self._fingerprint_cache_key(file)] = file_hash
+            self._save_fingerprint_cache()
+        
+        return [cache[key] for key in keys]
+    
+    def _calculate_fingerprints(self, files: List[Path]) -> List[str]:
+        """Считает отпечатки файлов (параллельно, если файлов несколько)"""
+        if self.hash_workers <= 1 or len(files) < 2:
+            return [_calculate_fingerprint(file) for file in files]
+        
+        with ThreadPoolExecutor(max_workers=min(self.hash_workers, len(files))) as executor:
+            return list(executor.map(_calculate_fingerprint, files))
+    
+    @staticmethod
+    def _fingerprint_cache_key(file: Path) -> str:
+        """Ключ кэша отпечатков: абсолютный путь, размер и mtime_ns"""
+        stat = file.stat()
+        return f"{file.resolve()}|{stat.st_size}|{stat.st_mtime_ns}"
+    
+    def _load_fingerprint_cache(self) -> Dict[str, str]:
+        """
+        Загружает кэш отпечатков из output_dir (один раз на экземпляр)
+        
+        Returns:
+            Словарь {ключ: хеш}, пустой если кэша нет, он поврежден
+            или посчитан другим алгоритмом
+        """
+        if self._fingerprint_cache is None:
+            cache_file = self.output_dir / _FINGERPRINT_CACHE_NAME
+            try:
+                with open(cache_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                data = {}
+            
+            if isinstance(data, dict) and data.get('algorithm') == _FINGERPRINT_ALGORITHM:
+                self._fingerprint_cache = data.get('fingerprints', {})
+            else:
+                self._fingerprint_cache = {}
+        return self._fingerprint_cache
+    
+    def _save_fingerprint_cache(self) -> None:
+        """Сохраняет кэш отпечатков, отбрасывая записи удаленных файлов"""
+        cache = self._fingerprint_cache or {}
+        self._fingerprint_cache = {
+            key: file_hash for key, file_hash in cache.items()
+            if os.path.exists(key.rsplit('|', 2)[0])
+        }
+        
+        cache_file = self.output_dir / _FINGERPRINT_CACHE_NAME
+        tmp_file = cache_file.with_name(cache_file.name + '.tmp')
+        try:
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'algorithm': _FINGERPRINT_ALGORITHM,
+                    'fingerprints': self._fingerprint_cache,
+                }, f)
+            os.replace(tmp_file, cache_file)
+        except OSError as e:
+            print(f"⚠️  Не удалось сохранить кэш отпечатков: {e}")
+    
     def _extract_username_from_url(self, url: str) -> str:
         """Извлечение username из URL"""
         match = re.search(r'instagram\.com/([^/]+)/', url)
@@ -282,34 +594,13 @@ class HybridGrabber:
                     print(f"⚠️  gallery-dl stderr: {result.stderr[:200]}")
                 
                 # Собираем все скачанные медиа файлы
-                media_files = []
                 # gallery-dl создает структуру: gallery-dl/instagram/username/postid_*.ext
-                for file in sorted(self.output_dir.rglob("*")):
-                    if file.is_file() and file.suffix in ['.mp4', '.jpg', '.png', '.webp', '.jpeg']:
-                        media_files.append(file)
+                file_sizes = self._collect_media_files()
+                media_files = list(file_sizes)
                 
-                # Удаляем дубликаты по MD5 хешу
+                # Удаляем дубликаты по хешу содержимого
                 print(f"📦 Найдено медиа файлов: {len(media_files)}")
-                unique_files = []
-                seen_hashes = set()
-                
-                for file in media_files:
-                    # Вычисляем MD5 хеш файла
-                    md5_hash = hashlib.md5()
-                    with open(file, 'rb') as f:
-                        # Читаем файл частями для экономии памяти
-                        for chunk in iter(lambda: f.read(8192), b''):
-                            md5_hash.update(chunk)
-                    file_hash = md5_hash.hexdigest()
-                    
-                    # Проверяем, не встречали ли мы этот хеш ранее
-                    if file_hash not in seen_hashes:
-                        seen_hashes.add(file_hash)
-                        unique_files.append(file)
-                    else:
-                        print(f"⚠️  Пропущен дубликат: {file.name} (хеш: {file_hash[:8]}...)")
-                
-                media_files = unique_files
+                media_files = self._deduplicate_media(media_files, file_sizes)
                 print(f"✅ Уникальных файлов: {len(media_files)}")
                 
                 # Переименовываем файлы и копируем в корень output_dir
@@ -337,7 +628,10 @@ class HybridGrabber:
                 
                 # Также ищем любые JSON в output_dir
                 if not json_files:
-                    json_files = list(self.output_dir.rglob("*.json"))
+                    json_files = [
+                        jf for jf in self.output_dir.rglob("*.json")
+                        if jf.name != _FINGERPRINT_CACHE_NAME
+                    ]
                 
                 if json_files:
                     try:
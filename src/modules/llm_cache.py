@@ -0,0 +1,95 @@
+"""
+LLMCache - Постоянный кэш ответов LLM
+
+Ответ модели сохраняется по SHA-256 от всех входных данных запроса
+(модель, описание, транскрипция, известные теги). Повторная обработка
+папки с теми же данными возвращает результат без обращения к Ollama.
+"""
+import hashlib
+import json
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+
+DEFAULT_CACHE_FILE = Path.home() / ".secbrain" / "llm_cache.sqlite"
+
+
+class LLMCache:
+    """Key-value кэш ответов LLM в SQLite"""
+    
+    def __init__(self, cache_file: Optional[Path] = None) -> None:
+        """
+        Args:
+            cache_file: Путь к SQLite базе (по умолчанию ~/.secbrain/llm_cache.sqlite)
+        """
+        self.cache_file = Path(cache_file) if cache_file else DEFAULT_CACHE_FILE
+        self._conn: Optional[sqlite3.Connection] = None
+    
+    @staticmethod
+    def make_key(*parts: str) -> str:
+        """
+        Ключ кэша: SHA-256 от частей запроса, разделенных нулевым байтом
+        
+        Args:
+            parts: Модель, описание, транскрипция, теги и т.д.
+        
+        Returns:
+            Hex-строка ключа
+        """
+        return hashlib.sha256(b"\0".join(part.encode('utf-8') for part in parts)).hexdigest()
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Ленивое открытие базы (таблица создается при первом обращении)"""
+        if self._conn is None:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.cache_file)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS KV (key TEXT PRIMARY KEY, value BLOB, ts INTEGER)"
+            )
+        return self._conn
+    
+    def get(self, key: str) -> Optional[Dict]:
+        """
+        Возвращает сохраненный ответ или None
+        
+        Args:
+            key: Ключ из make_key()
+        """
+        try:
+            row = self._connect().execute("SELECT value FROM KV WHERE key = ?", (key,)).fetchone()
+        except sqlite3.Error as e:
+            print(f"⚠️  Ошибка чтения кэша LLM: {e}")
+            return None
+        
+        if row is None:
+            return None
+        try:
+            return json.loads(row[0])
+        except ValueError:
+            return None
+    
+    def set(self, key: str, value: Dict) -> None:
+        """
+        Сохраняет ответ модели
+        
+        Args:
+            key: Ключ из make_key()
+            value: JSON-совместимый ответ
+        """
+        try:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO KV (key, value, ts) VALUES (?, ?, ?)",
+                    (key, json.dumps(value, ensure_ascii=False), int(time.time()))
+                )
+        except sqlite3.Error as e:
+            print(f"⚠️  Ошибка записи кэша LLM: {e}")
+    
+    def close(self) -> None:
+        """Закрывает соединение с базой"""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
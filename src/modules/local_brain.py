@@ -129,8 +129,7 @@ Output: strictly JSON.
             self.initialize()
         
         # Формирование промпта
-        user_prompt = self._build_prompt(caption, transcript, comments, author)
-        system_prompt = self.SYSTEM_PROMPT.replace("{known_tags}", known_tags)
+        messages = self._build_messages(caption, transcript, comments, author, known_tags)
         
         print("🧠 Анализ контента через LLM...")
         print("   ⏳ Отправка запроса к модели...")
@@ -151,39 +150,116 @@ Output: strictly JSON.
                 
                 response = self.client.chat(
                     model=self.model,
-                    messages=[
-                        {'role': 'system', 'content': system_prompt},
-                        {'role': 'user', 'content': user_prompt}
-                    ],
+                    messages=messages,
                     format='json',  # Требуем JSON ответ
-                    options={
-                        'temperature': 0.7,
-                        'num_predict': 500,  # Уменьшено для ускорения
-                        'num_thread': self.num_threads if self.num_threads else 8,
-                        'num_ctx': self.num_ctx if self.num_ctx else 8192
-                    }
+                    options=self._analyze_options()
                 )
                 
                 progress.update(task, completed=True)
             
             print("   ✅ Анализ завершён")
             
-            # Парсинг JSON ответа
-            result_text = response['message']['content']
-            result = json.loads(result_text)
-            
-            return result
+            return self._parse_response(response)
             
         except TimeoutError as e:
             print(f"⏱️  Timeout: {e}")
             return None
+        except Exception as e:
+            print(f"❌ Ошибка LLM: {e}")
+            return None
+    
+    def create_async_client(self):
+        """
+        Создает ollama.AsyncClient для aanalyze()
+        
+        Соединения клиента привязаны к event loop, поэтому клиент
+        создается на один asyncio.run и закрывается close_async_client().
+        
+        Returns:
+            ollama.AsyncClient
+        """
+        try:
+            import ollama
+        except ImportError:
+            raise ImportError(
+                "Библиотека ollama не установлена. "
+                "Установите: pip install ollama"
+            )
+        return ollama.AsyncClient(host=self.base_url)
+    
+    @staticmethod
+    async def close_async_client(client) -> None:
+        """Закрывает соединения клиента из create_async_client()"""
+        close = getattr(client, 'close', None)
+        if close is not None:
+            await close()
+        else:
+            # Старые версии ollama: закрываем httpx клиент напрямую
+            await client._client.aclose()
+    
+    async def aanalyze(
+        self,
+        client,
+        caption: str,
+        transcript: str,
+        comments: List[str],
+        author: str,
+        known_tags: str
+    ) -> Optional[Dict]:
+        """
+        Асинхронный анализ контента через ollama.AsyncClient
+        
+        Позволяет отправлять несколько запросов параллельно
+        (до OLLAMA_NUM_PARALLEL слотов сервера). Аргументы такие же,
+        как у analyze(), плюс клиент из create_async_client().
+        
+        В отличие от analyze(), ошибки запроса не перехватываются:
+        вызывающий код решает, повторить ли запрос синхронно.
+        
+        Returns:
+            Результат анализа или None, если ответ не разобран
+        """
+        messages = self._build_messages(caption, transcript, comments, author, known_tags)
+        response = await client.chat(
+            model=self.model,
+            messages=messages,
+            format='json',  # Требуем JSON ответ
+            options=self._analyze_options()
+        )
+        return self._parse_response(response)
+    
+    def _build_messages(
+        self,
+        caption: str,
+        transcript: str,
+        comments: List[str],
+        author: str,
+        known_tags: str
+    ) -> List[Dict]:
+        """Сообщения чата: системный промпт с известными тегами + контент"""
+        return [
+            {'role': 'system', 'content': self.SYSTEM_PROMPT.replace("{known_tags}", known_tags)},
+            {'role': 'user', 'content': self._build_prompt(caption, transcript, comments, author)}
+        ]
+    
+    def _analyze_options(self) -> Dict:
+        """Параметры генерации для анализа"""
+        return {
+            'temperature': 0.7,
+            'num_predict': 500,  # Уменьшено для ускорения
+            'num_thread': self.num_threads if self.num_threads else 8,
+            'num_ctx': self.num_ctx if self.num_ctx else 8192
+        }
+    
+    def _parse_response(self, response) -> Optional[Dict]:
+        """Парсинг JSON ответа модели"""
+        result_text = response['message']['content']
+        try:
+            return json.loads(result_text)
         except json.JSONDecodeError as e:
             print(f"❌ Ошибка парсинга JSON: {e}")
             print(f"Ответ LLM: {result_text[:200]}...")
             return None
-        except Exception as e:
-            print(f"❌ Ошибка LLM: {e}")
-            return None
     
     def _build_prompt(
         self,
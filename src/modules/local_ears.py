@@ -1,11 +1,20 @@
 """
 LocalEars - Транскрибация видео через faster-whisper
 """
+import threading
 from pathlib import Path
-from typing import Dict, Optional
+from types import SimpleNamespace
+from typing import Dict, Iterable, Iterator, Optional, Tuple
 from dataclasses import dataclass
 
 
+# Поддерживаемые движки распознавания
+WHISPER_BACKENDS = ("ctranslate2", "whispercpp")
+
+# Расширения файлов, которые можно транскрибировать
+MEDIA_EXTENSIONS = frozenset({'.mp4', '.mov', '.avi', '.mkv', '.webm', '.mp3', '.m4a', '.wav', '.flac', '.ogg'})
+
+
 @dataclass
 class TranscriptResult:
     """Результат транскрибации"""
@@ -13,6 +22,7 @@ class TranscriptResult:
     full_text: str         # Чистый текст
     language: str = "ru"
     duration: float = 0.0
+    segment_count: int = 0  # Количество сегментов с таймкодами
 
 
 class LocalEars:
@@ -23,7 +33,10 @@ class LocalEars:
         model_size: str = "small",  # Изменено с "base" на "small" для лучшей точности
         device: str = "cpu", 
         num_threads: int = 16,  # Оптимизировано: используем гиперпоточность для максимальной скорости
-        compute_type: str = "int8"  # int8 для CPU (float16 не поддерживается эффективно)
+        compute_type: str = "int8",  # int8 для CPU (float16 не поддерживается эффективно)
+        backend: str = "ctranslate2",
+        quant: Optional[str] = None,
+        num_workers: int = 1
     ):
         """
         Инициализация Whisper модели
@@ -40,16 +53,40 @@ class LocalEars:
                          int8 - оптимально для CPU: быстро + хорошая точность
                          float16 - только для GPU
                          float32 - самое медленное, максимальная точность
+            backend: Движок распознавания
+                    ctranslate2 - faster-whisper (по умолчанию)
+                    whispercpp - whisper.cpp через pywhispercpp (GGML/GGUF модели)
+            quant: Квантизация модели whisper.cpp (q4_k, q5_1, q8_0 ...):
+                  загружается модель "{model_size}-{quant}". Для ctranslate2
+                  не используется (см. compute_type). model_size может быть
+                  и путем к локальному файлу модели.
+            num_workers: Сколько transcribe() модель выполняет параллельно
+                        (ctranslate2; num_threads - потоки на одного воркера)
         """
+        if backend not in WHISPER_BACKENDS:
+            raise ValueError(f"Неизвестный backend: {backend} (доступны: {', '.join(WHISPER_BACKENDS)})")
         self.model_size = model_size
         self.device = device
         self.num_threads = num_threads
         self.compute_type = compute_type
+        self.backend = backend
+        self.quant = quant
+        self.num_workers = num_workers
         self.model = None
+        self._batched = None  # BatchedInferencePipeline (создается по требованию)
+        self._model_lock = threading.Lock()
     
     def load_model(self) -> None:
-        """Ленивая загрузка модели"""
-        if self.model is None:
+        """Ленивая загрузка модели (потокобезопасно: модель грузится один раз)"""
+        if self.model is not None:
+            return
+        
+        with self._model_lock:
+            if self.model is not None:
+                return
+            if self.backend == "whispercpp":
+                self._load_whispercpp()
+                return
             try:
                 from faster_whisper import WhisperModel
                 
@@ -59,7 +96,8 @@ class LocalEars:
                     self.model_size,
                     device=self.device,
                     compute_type=self.compute_type,
-                    cpu_threads=self.num_threads
+                    cpu_threads=self.num_threads,
+                    num_workers=self.num_workers
                 )
                 print("   ✅ Модель Whisper готова")
                 
@@ -69,6 +107,21 @@ class LocalEars:
                     "Установите: pip install faster-whisper"
                 )
     
+    def _load_whispercpp(self) -> None:
+        """Загрузка квантизованной GGML/GGUF модели whisper.cpp"""
+        try:
+            from pywhispercpp.model import Model
+        except ImportError:
+            raise ImportError(
+                "Библиотека pywhispercpp не установлена. "
+                "Установите: pip install pywhispercpp"
+            )
+        
+        model_name = f"{self.model_size}-{self.quant}" if self.quant else self.model_size
+        print(f"🔄 Загрузка whisper.cpp модели ({model_name})...")
+        self.model = Model(model_name, n_threads=self.num_threads, print_progress=False)
+        print("   ✅ Модель whisper.cpp готова")
+    
     def transcribe(self, media_path: Path) -> Optional[TranscriptResult]:
         """
         Транскрибация медиафайла
@@ -79,13 +132,7 @@ class LocalEars:
         Returns:
             TranscriptResult или None если не видео
         """
-        if not media_path or not media_path.exists():
-            return None
-        
-        # Проверяем, что это видео или аудио
-        valid_extensions = ['.mp4', '.mov', '.avi', '.mkv', '.webm', '.mp3', '.m4a', '.wav', '.flac', '.ogg']
-        if media_path.suffix.lower() not in valid_extensions:
-            print("ℹ️  Это изображение, транскрибация не требуется")
+        if not self._is_media(media_path):
             return None
         
         self.load_model()
@@ -93,9 +140,101 @@ class LocalEars:
         print("🎤 Транскрибация аудиодорожки...")
         print("   ⏳ Обработка...")
         
+        if self.backend == "whispercpp":
+            return self._transcribe_whispercpp(media_path)
+        
         # Запуск транскрибации с улучшенными параметрами
-        segments, info = self.model.transcribe(
+        segments, info = self.model.transcribe(str(media_path), **self._transcribe_options())
+        return self._collect(segments, info)
+    
+    def transcribe_batch(
+        self,
+        media_paths: Iterable[Path],
+        batch_size: int = 8
+    ) -> Iterator[Tuple[Path, Optional[TranscriptResult]]]:
+        """
+        Пакетная транскрибация нескольких файлов
+        
+        Фрагменты речи (после VAD) каждого файла декодируются пачками по
+        batch_size через BatchedInferencePipeline. Результаты отдаются
+        лениво, поэтому вызывающий код может остановиться на первом успехе.
+        Без BatchedInferencePipeline (faster-whisper < 1.1) файлы
+        обрабатываются обычным transcribe().
+        
+        Args:
+            media_paths: Пути к видео/аудио файлам
+            batch_size: Количество фрагментов в одном вызове модели
+            
+        Yields:
+            (путь, TranscriptResult или None)
+        """
+        for media_path in media_paths:
+            if not self._is_media(media_path):
+                yield media_path, None
+                continue
+            
+            self.load_model()
+            batched = self._get_batched_pipeline()
+            if batched is None:
+                yield media_path, self.transcribe(media_path)
+                continue
+            
+            print(f"🎤 Пакетная транскрибация: {media_path.name} (batch_size={batch_size})...")
+            options = self._transcribe_options()
+            # Длину фрагментов в пакетном режиме задает сам pipeline (chunk_length)
+            options['vad_parameters'].pop('max_speech_duration_s')
+            segments, info = batched.transcribe(str(media_path), batch_size=batch_size, **options)
+            yield media_path, self._collect(segments, info)
+    
+    def _transcribe_whispercpp(self, media_path: Path) -> TranscriptResult:
+        """Транскрибация через whisper.cpp (таймкоды сегментов в сотых долях секунды)"""
+        options = self._transcribe_options()
+        raw_segments = self.model.transcribe(
             str(media_path),
+            language=options['language'],
+            initial_prompt=options['initial_prompt']
+        )
+        segments = [SimpleNamespace(start=seg.t0 / 100, text=seg.text) for seg in raw_segments]
+        info = SimpleNamespace(
+            language=options['language'],
+            duration=raw_segments[-1].t1 / 100 if raw_segments else 0.0
+        )
+        return self._collect(segments, info)
+    
+    def _is_media(self, media_path: Optional[Path]) -> bool:
+        """Проверяет, что файл существует и это видео или аудио"""
+        if not media_path or not media_path.exists():
+            return False
+        
+        if media_path.suffix.lower() not in MEDIA_EXTENSIONS:
+            print("ℹ️  Это изображение, транскрибация не требуется")
+            return False
+        return True
+    
+    def _get_batched_pipeline(self):
+        """BatchedInferencePipeline поверх загруженной модели или None, если недоступен"""
+        if self.backend != "ctranslate2":
+            return None
+        if self._batched is None:
+            try:
+                from faster_whisper import BatchedInferencePipeline
+            except ImportError:
+                return None
+            with self._model_lock:
+                if self._batched is None:
+                    self._batched = BatchedInferencePipeline(model=self.model)
+        return self._batched
+    
+    @property
+    def max_concurrency(self) -> int:
+        """Сколько файлов можно транскрибировать одновременно из разных потоков"""
+        # Модель whisper.cpp не рассчитана на параллельные вызовы
+        return self.num_workers if self.backend == "ctranslate2" else 1
+    
+    @staticmethod
+    def _transcribe_options() -> Dict:
+        """Параметры распознавания (общие для обычного и пакетного режима)"""
+        return dict(
             language="ru",  # Можно изменить на None для auto-detect
             beam_size=10,   # Увеличено с 5 до 10 для лучшей точности
             best_of=5,      # Выбор лучшего из 5 вариантов
@@ -112,8 +251,9 @@ class LocalEars:
             initial_prompt="Транскрипция видео на русском языке из Instagram. "
                           "Включает разговорную речь, сленг, упоминания технологий и социальных сетей."
         )
-        
-        # Формирование результатов
+    
+    def _collect(self, segments, info) -> TranscriptResult:
+        """Формирование TranscriptResult из сегментов faster-whisper"""
         timed_lines = []
         full_lines = []
         segment_count = 0
@@ -135,7 +275,8 @@ class LocalEars:
             timed_transcript="\n".join(timed_lines),
             full_text=" ".join(full_lines),
             language=info.language,
-            duration=info.duration
+            duration=info.duration,
+            segment_count=segment_count
         )
     
     def _format_timestamp(self, seconds: float) -> str:
@@ -9,16 +9,37 @@ the code will raise ImportError with a friendly message.
 """
 from __future__ import annotations
 
+from collections import OrderedDict
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 import os
 import hashlib
+import threading
+import functools
+
+# how many per-user engines (Chroma clients) stay open at once
+RAG_CACHE_SIZE = 4
+
+_engines: "OrderedDict[str, Tuple[RAGEngine, int]]" = OrderedDict()
+_engines_lock = threading.Lock()
+_embedder_lock = threading.Lock()
 
 
 def _hash_text(text: str) -> str:
     return hashlib.sha256(text.encode('utf-8')).hexdigest()
 
 
+@functools.lru_cache(maxsize=None)
+def _load_embedder(model_cls, model_name: str):
+    return model_cls(model_name)
+
+
+def _shared_embedder(model_cls, model_name: str):
+    """Return the embedding model for a name, loaded once for all engines."""
+    with _embedder_lock:
+        return _load_embedder(model_cls, model_name)
+
+
 class RAGEngine:
     """A small RAG engine using chromadb + sentence-transformers.
 
@@ -52,8 +73,16 @@ class RAGEngine:
         self._client = None
         self._collection = None
         self._embedder = None
+        # LocalBrain for answers, created on the first query()
+        self._brain = None
+        # one engine may be shared by several indexing threads
+        self._init_lock = threading.Lock()
 
     def _init_client(self) -> None:
+        with self._init_lock:
+            self._init_client_locked()
+
+    def _init_client_locked(self) -> None:
         if self._client is None:
             # ensure user_root exists
             if not self.user_root:
@@ -68,38 +97,88 @@ class RAGEngine:
             self._collection = self._client.get_or_create_collection(name='secbrain')
 
         if self._embedder is None:
-            # load sentence-transformers model (CPU)
-            self._embedder = self.EmbedModel(self.embedding_model_name)
+            # load sentence-transformers model (CPU), shared by all users' engines
+            self._embedder = _shared_embedder(self.EmbedModel, self.embedding_model_name)
+
+    def _discover_user_root(self, folder: Path) -> None:
+        """Set user_root from the folder path if it was not provided."""
+        if self.user_root is not None:
+            return
+        for p in folder.parents:
+            # New structure: users/{username}/downloads/
+            # We check if we are at 'downloads' folder and if its grandparent is 'users'
+            # But careful with path boundaries.
+            if p.name == 'downloads':
+                # Check if grandparent name is 'users' (approximate check)
+                try:
+                     if p.parent.parent.name == 'users':
+                         self.user_root = p
+                         break
+                except Exception:
+                    pass
+            
+            # Compatibility logic
+            if p.name and (p.parent.name == 'downloads' or '_' in p.name):
+                # choose the first ancestor under downloads or containing '_'
+                self.user_root = p
+                break
+        if self.user_root is None:
+            # fallback to folder.parent
+            self.user_root = folder.parent
+
+    def _collect_chunks(self, folder: Path, texts: List[str], metadatas: List[Dict], ids: List[str]) -> None:
+        """Split the folder's text files into chunks and append them to the batch lists."""
+        # Prioritise files: Knowledge.md, description.md, transcript.md
+        priority_files = ["Knowledge.md", "description.md", "transcript.md"]
+
+        for fname in priority_files:
+            fpath = folder / fname
+            # one open() instead of exists() + is_file() + read
+            try:
+                content = fpath.read_text(encoding='utf-8')
+            except (FileNotFoundError, IsADirectoryError):
+                continue
+            source_type = 'unknown'
+            if fname == 'Knowledge.md':
+                source_type = 'summary'
+            elif fname == 'description.md':
+                source_type = 'description'
+            elif fname == 'transcript.md':
+                source_type = 'transcript'
+
+            # Split into chunks
+            splitter = self.TextSplitter(chunk_size=1000, chunk_overlap=150)
+            chunks = splitter.split_text(content)
+            for idx, chunk in enumerate(chunks):
+                chunk_id = _hash_text(f"{fname}:{idx}:{chunk[:64]}")
+                texts.append(chunk)
+                metadatas.append({
+                    'folder_name': folder.name,
+                    'file_path': str(fpath),
+                    'source_type': source_type,
+                })
+                ids.append(chunk_id)
 
     def index_folder(self, folder: Path) -> int:
         """Index files from a folder into the user's ChromaDB.
 
         Returns number of chunks indexed (added or upserted).
         """
-        folder = Path(folder)
+        return self.index_folders([folder])
+
+    def index_folders(self, folders: List[Path]) -> int:
+        """Index several folders with a single embedding batch and upsert.
+
+        All chunks are encoded in one encode() call, so the embedding model
+        runs full batches instead of one small batch per folder.
+
+        Returns number of chunks indexed (added or upserted).
+        """
+        folders = [Path(folder) for folder in folders]
+        if not folders:
+            return 0
         # discover user_root if not provided: look for ancestor named like 'digits_'
-        if self.user_root is None:
-            for p in folder.parents:
-                # New structure: users/{username}/downloads/
-                # We check if we are at 'downloads' folder and if its grandparent is 'users'
-                # But careful with path boundaries.
-                if p.name == 'downloads':
-                    # Check if grandparent name is 'users' (approximate check)
-                    try:
-                         if p.parent.parent.name == 'users':
-                             self.user_root = p
-                             break
-                    except Exception:
-                        pass
-                
-                # Compatibility logic
-                if p.name and (p.parent.name == 'downloads' or '_' in p.name):
-                    # choose the first ancestor under downloads or containing '_'
-                    self.user_root = p
-                    break
-            if self.user_root is None:
-                # fallback to folder.parent
-                self.user_root = folder.parent
+        self._discover_user_root(folders[0])
 
         self._init_client()
 
@@ -107,39 +186,22 @@ class RAGEngine:
         metadatas: List[Dict] = []
         ids: List[str] = []
 
-        # Prioritise files: Knowledge.md, description.md, transcript.md
-        priority_files = ["Knowledge.md", "description.md", "transcript.md"]
-
-        for fname in priority_files:
-            fpath = folder / fname
-            if fpath.exists() and fpath.is_file():
-                content = fpath.read_text(encoding='utf-8')
-                source_type = 'unknown'
-                if fname == 'Knowledge.md':
-                    source_type = 'summary'
-                elif fname == 'description.md':
-                    source_type = 'description'
-                elif fname == 'transcript.md':
-                    source_type = 'transcript'
-
-                # Split into chunks
-                splitter = self.TextSplitter(chunk_size=1000, chunk_overlap=150)
-                chunks = splitter.split_text(content)
-                for idx, chunk in enumerate(chunks):
-                    chunk_id = _hash_text(f"{fname}:{idx}:{chunk[:64]}")
-                    texts.append(chunk)
-                    metadatas.append({
-                        'folder_name': folder.name,
-                        'file_path': str(fpath),
-                        'source_type': source_type,
-                    })
-                    ids.append(chunk_id)
+        for folder in folders:
+            self._collect_chunks(folder, texts, metadatas, ids)
 
         if not texts:
             return 0
 
+        # chunk ids do not include the folder, so several folders may produce
+        # the same id; keep the last one, as sequential upserts would
+        if len(set(ids)) != len(ids):
+            last = {chunk_id: i for i, chunk_id in enumerate(ids)}
+            keep = sorted(last.values())
+            texts = [texts[i] for i in keep]
+            metadatas = [metadatas[i] for i in keep]
+            ids = [ids[i] for i in keep]
+
         # compute embeddings
-        self._init_client()
         embeddings = self._embedder.encode(texts, show_progress_bar=False)
 
         # Upsert into collection (use add/upsert depending on API)
@@ -196,8 +258,11 @@ class RAGEngine:
 
         # Ask LocalBrain for a grounded answer
         try:
-            from src.modules.local_brain import LocalBrain
-            lb = LocalBrain()
+            if self._brain is None:
+                from src.modules.local_brain import LocalBrain
+                self._brain = LocalBrain()
+                self._brain.initialize()
+            lb = self._brain
             # system prompt per spec
             system = """
 Ты — умный помощник. Отвечай на вопрос ТОЛЬКО на основе приведенного ниже контекста.
@@ -211,7 +276,6 @@ class RAGEngine:
 
             # Use LocalBrain to call LLM (it expects to return JSON in some cases), but here we just ask for plain text
             # We'll directly call ollama via LocalBrain.client to keep behavior consistent with project
-            lb.initialize()
             response = lb.client.chat(
                 model=lb.model,
                 messages=[
@@ -230,3 +294,36 @@ class RAGEngine:
             'sources': folders,
             'chunks': chunks,
         }
+
+
+def _root_mtime(user_root: Path) -> int:
+    try:
+        return user_root.stat().st_mtime_ns
+    except OSError:
+        return 0
+
+
+def get_rag_engine(user_root: str) -> RAGEngine:
+    """Return the shared RAGEngine for a user root.
+
+    The ChromaDB client is opened once per user and reused by every index
+    and query call instead of being rebuilt for each request. Only the
+    RAG_CACHE_SIZE most recently used engines are kept, and an engine is
+    rebuilt when the user root changed after it was loaded (new content
+    may have been indexed by another process).
+    """
+    root = Path(user_root)
+    key = str(root)
+    mtime = _root_mtime(root)
+    with _engines_lock:
+        entry = _engines.get(key)
+        if entry is not None and entry[1] >= mtime:
+            _engines.move_to_end(key)
+            return entry[0]
+
+        engine = RAGEngine(user_root=root)
+        _engines[key] = (engine, mtime)
+        _engines.move_to_end(key)
+        while len(_engines) > RAG_CACHE_SIZE:
+            _engines.popitem(last=False)
+        return engine
@@ -9,7 +9,7 @@ import time
 import random
 from pathlib import Path
 from typing import List, Dict, Optional
-from playwright.sync_api import sync_playwright, Page, BrowserContext
+from playwright.sync_api import sync_playwright, Browser, Page, BrowserContext
 
 
 class SafeCommentsScraper:
@@ -26,6 +26,8 @@ class SafeCommentsScraper:
         self.cookies_file = Path(cookies_file)
         self.headless = headless
         self.captured_data = []
+        self._playwright = None  # Запущенный Playwright (после start())
+        self._browser: Optional[Browser] = None
         
     def _handle_response(self, response):
         """
@@ -184,24 +186,21 @@ class SafeCommentsScraper:
         
         print(f"   ✅ Эмуляция завершена (скроллов: {scroll_count})")
     
-    def scrape_comments(self, post_url: str, scroll_duration: int = 15) -> List[Dict]:
+    def start(self) -> None:
         """
-        Основной метод: скрапит комментарии с поста
+        Запускает Chromium один раз для нескольких scrape_comments()
         
-        Args:
-            post_url: URL поста Instagram
-            scroll_duration: Сколько секунд скроллить (больше = больше комментариев)
-            
-        Returns:
-            Список комментариев в формате [{'user': str, 'text': str}, ...]
+        Объекты sync API Playwright привязаны к потоку: start(), все
+        scrape_comments() и stop() должны вызываться из одного потока.
         """
-        print(f"🎭 Запуск безопасного браузера...")
-        
-        self.captured_data = []
+        if self._browser is not None:
+            return
         
-        with sync_playwright() as p:
+        print(f"🎭 Запуск безопасного браузера...")
+        self._playwright = sync_playwright().start()
+        try:
             # Запуск браузера с антидетект параметрами
-            browser = p.chromium.launch(
+            self._browser = self._playwright.chromium.launch(
                 headless=self.headless,
                 args=[
                     "--disable-blink-features=AutomationControlled",  # Скрываем автоматизацию
@@ -210,55 +209,106 @@ class SafeCommentsScraper:
                     "--disable-setuid-sandbox"
                 ]
             )
+        except Exception:
+            self._playwright.stop()
+            self._playwright = None
+            raise
+    
+    def stop(self) -> None:
+        """Закрывает браузер и Playwright"""
+        if self._browser is not None:
+            self._browser.close()
+            self._browser = None
+        if self._playwright is not None:
+            self._playwright.stop()
+            self._playwright = None
+    
+    def __enter__(self) -> "SafeCommentsScraper":
+        self.start()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.stop()
+    
+    def _visit_post(self, context: BrowserContext, post_url: str, scroll_duration: int) -> bool:
+        """
+        Открывает пост в контексте и скроллит комментарии
+        
+        Returns:
+            False если требуется авторизация, которую нельзя пройти
+        """
+        # Загружаем cookies
+        cookies_loaded = self._load_cookies(context)
+        
+        # Создаем страницу
+        page = context.new_page()
+        
+        # Подключаем перехватчик ответов
+        page.on("response", self._handle_response)
+        
+        # Переходим на пост с увеличенным timeout
+        print(f"🔗 Переход на: {post_url}")
+        try:
+            page.goto(post_url, wait_until="domcontentloaded", timeout=60000)
+        except Exception as e:
+            print(f"   ⚠️  Загрузка заняла больше времени: {e}")
+            # Продолжаем даже если timeout - страница может быть частично загружена
+        
+        # Ждем загрузки
+        time.sleep(random.uniform(3, 5))
+        
+        # Проверяем, не требуется ли логин
+        if "login" in page.url or page.locator('input[name="username"]').count() > 0:
+            print("   🔐 Требуется авторизация!")
+            
+            if not self.headless:
+                print("   ⏳ Войдите вручную в открывшемся окне (60 секунд)...")
+                time.sleep(60)
+                
+                # Сохраняем cookies после входа
+                self._save_cookies(context)
+            else:
+                print("   ❌ Не могу войти в headless режиме. Используйте headless=False")
+                return False
+        
+        # Эмулируем поведение человека
+        self._emulate_human_behavior(page, duration=scroll_duration)
+        return True
+    
+    def scrape_comments(self, post_url: str, scroll_duration: int = 15) -> List[Dict]:
+        """
+        Основной метод: скрапит комментарии с поста
+        
+        Args:
+            post_url: URL поста Instagram
+            scroll_duration: Сколько секунд скроллить (больше = больше комментариев)
             
-            # Создаем контекст с реалистичными параметрами
-            context = browser.new_context(
+        Returns:
+            Список комментариев в формате [{'user': str, 'text': str}, ...]
+        """
+        self.captured_data = []
+        
+        # Без start() браузер запускается только на этот вызов
+        owns_browser = self._browser is None
+        if owns_browser:
+            self.start()
+        
+        try:
+            # Новый контекст на каждый пост: браузер общий, cookies и вкладки - нет
+            context = self._browser.new_context(
                 user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
                 viewport={'width': 1280, 'height': 800},
                 locale='en-US',
                 timezone_id='America/New_York'
             )
-            
-            # Загружаем cookies
-            cookies_loaded = self._load_cookies(context)
-            
-            # Создаем страницу
-            page = context.new_page()
-            
-            # Подключаем перехватчик ответов
-            page.on("response", self._handle_response)
-            
-            # Переходим на пост с увеличенным timeout
-            print(f"🔗 Переход на: {post_url}")
             try:
-                page.goto(post_url, wait_until="domcontentloaded", timeout=60000)
-            except Exception as e:
-                print(f"   ⚠️  Загрузка заняла больше времени: {e}")
-                # Продолжаем даже если timeout - страница может быть частично загружена
-            
-            # Ждем загрузки
-            time.sleep(random.uniform(3, 5))
-            
-            # Проверяем, не требуется ли логин
-            if "login" in page.url or page.locator('input[name="username"]').count() > 0:
-                print("   🔐 Требуется авторизация!")
-                
-                if not self.headless:
-                    print("   ⏳ Войдите вручную в открывшемся окне (60 секунд)...")
-                    time.sleep(60)
-                    
-                    # Сохраняем cookies после входа
-                    self._save_cookies(context)
-                else:
-                    print("   ❌ Не могу войти в headless режиме. Используйте headless=False")
-                    browser.close()
+                if not self._visit_post(context, post_url, scroll_duration):
                     return []
-            
-            # Эмулируем поведение человека
-            self._emulate_human_behavior(page, duration=scroll_duration)
-            
-            # Закрываем браузер
-            browser.close()
+            finally:
+                context.close()
+        finally:
+            if owns_browser:
+                self.stop()
         
         print(f"   📊 Перехвачено пакетов данных: {len(self.captured_data)}")
         
@@ -3,7 +3,13 @@ TagManager - Управление базой тегов для консисте
 """
 import json
 from pathlib import Path
-from typing import List, Set
+from typing import List, Optional, Set
+
+try:
+    import orjson
+except ImportError:
+    # orjson не установлен — используем стандартный json
+    orjson = None
 
 
 class TagManager:
@@ -29,17 +35,20 @@ class TagManager:
         
         self.tags_file = tags_file
         self.known_tags: Set[str] = set()
+        # Готовая строка для промпта (сбрасывается при изменении базы)
+        self._tags_string: Optional[str] = None
         self.load_tags()
     
     def load_tags(self) -> None:
         """Загрузка тегов из файла или создание с дефолтными"""
+        self._tags_string = None
         if self.tags_file.exists():
             try:
-                with open(self.tags_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    # Если в файле есть ключ 'tags', используем его, иначе считаем файл пустым
-                    self.known_tags = set(data.get('tags', []))
-            except (json.JSONDecodeError, IOError) as e:
+                raw = self.tags_file.read_bytes()
+                data = orjson.loads(raw) if orjson is not None else json.loads(raw)
+                # Если в файле есть ключ 'tags', используем его, иначе считаем файл пустым
+                self.known_tags = set(data.get('tags', []))
+            except (ValueError, IOError) as e:
                 print(f"⚠️  Ошибка чтения {self.tags_file}: {e}")
                 # При ошибке чтения — инициализируем пустой набор тегов
                 self.known_tags = set()
@@ -53,10 +62,13 @@ class TagManager:
         """Сохранение тегов в файл"""
         self.tags_file.parent.mkdir(parents=True, exist_ok=True)
         
-        with open(self.tags_file, 'w', encoding='utf-8') as f:
-            json.dump({
-                'tags': sorted(list(self.known_tags))
-            }, f, indent=2, ensure_ascii=False)
+        data = {'tags': sorted(self.known_tags)}
+        if orjson is not None:
+            # orjson сразу отдает UTF-8 байты, без промежуточной строки
+            self.tags_file.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+        else:
+            with open(self.tags_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=2, ensure_ascii=False)
     
     def get_tags_string(self) -> str:
         """
@@ -65,7 +77,9 @@ class TagManager:
         Returns:
             Строка вида: "ai, productivity, coding, health, marketing"
         """
-        return ", ".join(sorted(self.known_tags))
+        if self._tags_string is None:
+            self._tags_string = ", ".join(sorted(self.known_tags))
+        return self._tags_string
     
     def add_tags(self, new_tags: List[str]) -> int:
         """
@@ -86,6 +100,7 @@ class TagManager:
         added_count = len(self.known_tags) - before_count
         
         if added_count > 0:
+            self._tags_string = None
             self.save_tags()
         
         return added_count
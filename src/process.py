@@ -8,6 +8,7 @@ SecBrain Process Script
 Пропускает папки, где Knowledge.md уже существует.
 """
 
+import os
 import sys
 from pathlib import Path
 from typing import List, Optional
@@ -20,6 +21,11 @@ from modules.tag_manager import TagManager
 
 console = Console()
 
+# Медиа файлы, по которым папка считается содержащей данные
+_DATA_MEDIA_SUFFIXES = frozenset({'.jpg', '.jpeg', '.png', '.mp4'})
+# Медиа файлы, которые передаются в анализ
+_MEDIA_SUFFIXES = frozenset({'.jpg', '.jpeg', '.png', '.mp4', '.mov', '.avi', '.mkv'})
+
 
 def print_banner():
     """Отображает баннер программы"""
@@ -43,18 +49,18 @@ class ContentData:
         
     def _read_file(self, filename: str) -> Optional[str]:
         """Читает файл из папки"""
-        file_path = self.folder / filename
-        if file_path.exists():
-            return file_path.read_text(encoding='utf-8')
-        return None
+        try:
+            return (self.folder / filename).read_text(encoding='utf-8')
+        except FileNotFoundError:
+            return None
     
     def _get_media_files(self) -> List[Path]:
         """Получает список медиа-файлов"""
-        extensions = {'.jpg', '.jpeg', '.png', '.mp4', '.mov', '.avi', '.mkv'}
-        return sorted([
-            f for f in self.folder.iterdir()
-            if f.suffix.lower() in extensions
-        ])
+        with os.scandir(self.folder) as entries:
+            return sorted(
+                Path(entry.path) for entry in entries
+                if os.path.splitext(entry.name)[1].lower() in _MEDIA_SUFFIXES
+            )
     
     def get_text_for_analysis(self) -> str:
         """Формирует текст для AI анализа"""
@@ -114,18 +120,27 @@ def find_unprocessed_folders(inbox_dir: Path) -> List[Path]:
         console.print(f"⚠️  Директория {inbox_dir} не найдена", style="yellow")
         return unprocessed
     
-    for folder in inbox_dir.iterdir():
-        if folder.is_dir():
-            note_file = folder / "Knowledge.md"
-            if not note_file.exists():
-                # Проверяем, что есть хотя бы один из файлов данных
-                has_data = (
-                    (folder / "caption.md").exists() or
-                    (folder / "transcript.md").exists() or
-                    any(f.suffix.lower() in ['.jpg', '.jpeg', '.png', '.mp4'] for f in folder.iterdir())
-                )
-                if has_data:
-                    unprocessed.append(folder)
+    # Один проход scandir на уровень: имена файлов папки читаются разом,
+    # вместо отдельных exists() для Knowledge/caption/transcript и iterdir()
+    with os.scandir(inbox_dir) as folders:
+        for folder_entry in folders:
+            if not folder_entry.is_dir():
+                continue
+            
+            with os.scandir(folder_entry.path) as entries:
+                names = {entry.name for entry in entries}
+            
+            if "Knowledge.md" in names:
+                continue
+            
+            # Проверяем, что есть хотя бы один из файлов данных
+            has_data = (
+                "caption.md" in names or
+                "transcript.md" in names or
+                any(os.path.splitext(name)[1].lower() in _DATA_MEDIA_SUFFIXES for name in names)
+            )
+            if has_data:
+                unprocessed.append(Path(folder_entry.path))
     
     return sorted(unprocessed)
 
@@ -283,7 +298,7 @@ def process_folder(folder: Path, config: Config, brain: LocalBrain, tag_manager:
                         current_comment = ""
             
             # Получаем known_tags
-            known_tags_str = ", ".join(sorted(tag_manager.known_tags))
+            known_tags_str = tag_manager.get_tags_string()
             
             # Извлекаем автора из метаданных
             metadata = extract_metadata_from_folder(folder)
@@ -0,0 +1,30 @@
+"""
+Unit Tests for bot content router
+=================================
+
+Тесты фильтра ссылок, по которому сообщения попадают в handle_url.
+"""
+import pytest
+
+pytest.importorskip("aiogram")
+pytest.importorskip("pydantic_settings")
+
+from src.bot.routers.content import _is_supported_url
+
+
+class TestSupportedUrlFilter:
+    """Тесты для _is_supported_url"""
+    
+    @pytest.mark.parametrize("text", [
+        "https://www.youtube.com/watch?v=abc",
+        "https://youtu.be/abc",
+        "instagram.com/reel/abc",
+    ])
+    def test_message_starting_with_link(self, text):
+        """Тест: сообщение, начинающееся со ссылки, обрабатывается"""
+        assert _is_supported_url(text)
+    
+    def test_host_mentioned_mid_text_is_ignored(self):
+        """Тест: упоминание хоста в середине текста не запускает загрузку"""
+        assert not _is_supported_url("посмотри https://youtube.com/x")
+        assert not _is_supported_url("я читаю instagram.com каждый день")
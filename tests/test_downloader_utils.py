@@ -0,0 +1,24 @@
+"""
+Unit Tests for downloader_utils
+===============================
+
+Тесты очистки имен файлов и папок.
+"""
+from modules.downloader_utils import clean_filename, sanitize_name
+
+
+class TestDownloaderUtils:
+    """Тесты для утилит загрузчиков"""
+    
+    def test_clean_filename_removes_invalid_chars(self):
+        """Тест: недопустимые символы удаляются, пробелы заменяются на _"""
+        assert clean_filename('a<b>:c  "d"/e\\f|g?h*') == "abc_defgh"
+        assert clean_filename("???") == "untitled"
+    
+    def test_sanitize_name_matches_isalnum_filter(self):
+        """Тест: результат совпадает с посимвольным фильтром isalnum()"""
+        name = "2024-01-01_автор_Привет, мир! 😀 ²/x.y"
+        expected = "".join(c if c.isalnum() or c in "._- " else "_" for c in name)
+        
+        assert sanitize_name(name) == expected
+        assert sanitize_name(name) == "2024-01-01_автор_Привет_ мир_ _ ²_x.y"
@@ -67,6 +67,50 @@ class TestHybridGrabber:
         call_args = str(mock_subprocess.call_args)
         assert 'gallery-dl' in call_args or media_files is not None
     
+    def test_deduplicate_media(self, temp_dir):
+        """Тест удаления дубликатов по содержимому"""
+        first = temp_dir / "1.jpg"
+        first.write_bytes(b"same content")
+        duplicate = temp_dir / "2.jpg"
+        duplicate.write_bytes(b"same content")
+        same_size = temp_dir / "3.jpg"
+        same_size.write_bytes(b"other conten")
+        unique_size = temp_dir / "4.mp4"
+        unique_size.write_bytes(b"unique")
+        
+        grabber = HybridGrabber(output_dir=temp_dir)
+        unique = grabber._deduplicate_media([first, duplicate, same_size, unique_size])
+        
+        assert unique == [first, same_size, unique_size]
+    
+    def test_fingerprint_cache_reused(self, temp_dir):
+        """Тест повторного использования кэша отпечатков между запусками"""
+        first = temp_dir / "1.jpg"
+        first.write_bytes(b"same content")
+        duplicate = temp_dir / "2.jpg"
+        duplicate.write_bytes(b"same content")
+        
+        HybridGrabber(output_dir=temp_dir)._deduplicate_media([first, duplicate])
+        assert (temp_dir / ".dedup_cache.json").exists()
+        
+        with patch('modules.hybrid_grabber._calculate_fingerprint') as mock_hash:
+            grabber = HybridGrabber(output_dir=temp_dir)
+            unique = grabber._deduplicate_media([first, duplicate])
+        
+        mock_hash.assert_not_called()
+        assert unique == [first]
+    
+    def test_fingerprint_cache_disabled(self, temp_dir):
+        """Тест работы без кэша отпечатков (временная output_dir)"""
+        first = temp_dir / "1.jpg"
+        first.write_bytes(b"same content")
+        duplicate = temp_dir / "2.jpg"
+        duplicate.write_bytes(b"same content")
+        
+        grabber = HybridGrabber(output_dir=temp_dir, fingerprint_cache=False)
+        assert grabber._deduplicate_media([first, duplicate]) == [first]
+        assert not (temp_dir / ".dedup_cache.json").exists()
+    
     def test_instagram_content_dataclass(self):
         """Тест структуры данных InstagramContent"""
         content = InstagramContent(
@@ -0,0 +1,35 @@
+"""
+Unit Tests for LLMCache
+=======================
+
+Тесты для кэша ответов LLM.
+"""
+import pytest
+
+from modules.llm_cache import LLMCache
+
+
+class TestLLMCache:
+    """Тесты для LLMCache"""
+    
+    def test_make_key_depends_on_all_parts(self):
+        """Тест: ключ различается при изменении любой части запроса"""
+        key = LLMCache.make_key("model", "desc", "transcript", "tags")
+        
+        assert key == LLMCache.make_key("model", "desc", "transcript", "tags")
+        assert key != LLMCache.make_key("other", "desc", "transcript", "tags")
+        assert key != LLMCache.make_key("model", "desc", "transcript", "")
+        # Разделитель не дает склеить соседние части
+        assert LLMCache.make_key("ab", "c") != LLMCache.make_key("a", "bc")
+    
+    def test_get_set_roundtrip(self, tmp_path):
+        """Тест сохранения и чтения ответа между экземплярами"""
+        cache_file = tmp_path / "cache.sqlite"
+        summary = {"summary": "Саммари", "tags": ["ai"]}
+        
+        cache = LLMCache(cache_file)
+        assert cache.get("key") is None
+        cache.set("key", summary)
+        cache.close()
+        
+        assert LLMCache(cache_file).get("key") == summary
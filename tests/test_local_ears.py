@@ -69,6 +69,7 @@ class TestLocalEars:
         assert isinstance(result, TranscriptResult)
         assert result.language == "ru"
         assert "Тестовая транскрипция" in result.full_text
+        assert result.segment_count == 1
     
     def test_format_timestamp_seconds(self):
         """Тест форматирования таймкодов (секунды)"""
@@ -79,3 +80,50 @@ class TestLocalEars:
         assert ears._format_timestamp(90) == "01:30"
         assert ears._format_timestamp(3600) == "60:00"  # 1 час = 60 минут
 
+    
+    @patch('modules.local_ears.LocalEars.load_model')
+    def test_transcribe_batch_uses_batched_pipeline(self, mock_load_model, tmp_path):
+        """Тест пакетной транскрибации: файлы отдаются лениво, картинки пропускаются"""
+        image_file = tmp_path / "cover.jpg"
+        image_file.write_text("fake image")
+        video_file = tmp_path / "video.mp4"
+        video_file.write_text("fake video")
+        
+        ears = LocalEars()
+        mock_segment = MagicMock(start=0.0, text=" Пакетная транскрипция")
+        mock_info = MagicMock(language="ru", duration=5.0)
+        ears._batched = MagicMock()
+        ears._batched.transcribe.return_value = ([mock_segment], mock_info)
+        
+        results = list(ears.transcribe_batch([image_file, video_file], batch_size=4))
+        
+        assert results[0] == (image_file, None)
+        assert results[1][0] == video_file
+        assert "Пакетная транскрипция" in results[1][1].full_text
+        kwargs = ears._batched.transcribe.call_args.kwargs
+        assert kwargs['batch_size'] == 4
+        assert 'max_speech_duration_s' not in kwargs['vad_parameters']
+    
+    def test_init_unknown_backend(self):
+        """Тест: неизвестный backend отклоняется сразу"""
+        with pytest.raises(ValueError):
+            LocalEars(backend="unknown")
+    
+    @patch('modules.local_ears.LocalEars.load_model')
+    def test_transcribe_whispercpp(self, mock_load_model, tmp_path):
+        """Тест транскрибации через whisper.cpp (таймкоды в сотых долях секунды)"""
+        audio_file = tmp_path / "test.mp3"
+        audio_file.write_text("fake audio")
+        
+        ears = LocalEars(backend="whispercpp", quant="q4_k")
+        ears.model = MagicMock()
+        ears.model.transcribe.return_value = [
+            MagicMock(t0=0, t1=500, text=" Первый"),
+            MagicMock(t0=6500, t1=7000, text=" Второй"),
+        ]
+        
+        result = ears.transcribe(audio_file)
+        
+        assert result.full_text == "Первый Второй"
+        assert "[01:05] Второй" in result.timed_transcript
+        assert result.duration == 70.0
@@ -85,3 +85,39 @@ class TestTranscriptionProcessor:
         
         assert stats['no_media'] is True
         assert stats['success'] is False
+
+
+def test_folder_log_prefix_marks_lines_live():
+    """Строки печатаются сразу и помечаются номером папки потока"""
+    import io
+    import threading
+    from module2_transcribe import _FolderLogPrefix
+
+    out = io.StringIO()
+    log = _FolderLogPrefix(out)
+    both_started = threading.Barrier(2)
+    live = []
+
+    def worker(name):
+        log.start(f"[{name}]")
+        log.write(f"{name}-1\n")
+        both_started.wait()
+        # Первая строка уже напечатана, не дожидаясь конца папки
+        live.append(f"[{name}] {name}-1\n" in out.getvalue())
+        log.write(f"{name}-")
+        log.write("2\n")
+        log.write(f"{name}-tail")
+        log.finish()
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in ("a", "b")]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert live == [True, True]
+    lines = out.getvalue().splitlines()
+    assert sorted(lines) == ["[a] a-1", "[a] a-2", "[a] a-tail", "[b] b-1", "[b] b-2", "[b] b-tail"]
+    # Без метки поток пишет как обычно
+    log.write("plain\n")
+    assert out.getvalue().endswith("plain\n")
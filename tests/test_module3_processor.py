@@ -1,14 +1,16 @@
+import os
 import pytest
-from unittest.mock import Mock, patch, MagicMock
+from unittest.mock import AsyncMock, Mock, patch, MagicMock
 from pathlib import Path
-from module3_analyze import AIProcessor
+from module3_analyze import AIProcessor, FolderMeta
 
 class TestAIProcessor:
     @pytest.fixture
     def processor(self, tmp_path):
         return AIProcessor(
             content_dir=tmp_path / "downloads",
-            tags_file=tmp_path / "known_tags.json"
+            tags_file=tmp_path / "known_tags.json",
+            cache_file=tmp_path / "llm_cache.sqlite"
         )
 
     def test_should_process_folder(self, processor, tmp_path):
@@ -76,6 +78,120 @@ class TestAIProcessor:
         assert "#tag2" in content
         assert "Test Category" in content
 
+    def test_reprocess_when_inputs_change(self, processor, tmp_path):
+        folder = tmp_path / "downloads" / "instagram_ID1_Title"
+        folder.mkdir(parents=True)
+        description = folder / "description.md"
+        description.write_text("Old description")
+        (folder / "Knowledge.md").write_text("note")
+        
+        # Заметка без файла состояния считается актуальной
+        should, reason = processor.should_process_folder(folder)
+        assert not should
+        
+        processor._save_state(folder)
+        should, reason = processor.should_process_folder(folder)
+        assert not should
+        assert "Knowledge.md существует" in reason
+        
+        # description.md изменился после создания заметки -> обработать заново
+        stat = description.stat()
+        os.utime(description, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        should, reason = processor.should_process_folder(folder)
+        assert should
+
+    def test_rag_engine_shared_by_user_folders(self, processor, tmp_path):
+        engines = {}
+        indexed = []
+
+        class FakeRAG:
+            def index_folder(self, folder):
+                indexed.append(folder)
+                return 1
+
+        def fake_get_rag(user_root):
+            return engines.setdefault(user_root, FakeRAG())
+
+        processor.brain = Mock()
+        processor.brain.analyze.return_value = {'summary': 'AI summary', 'tags': [], 'category': 'Test'}
+        processor.tag_manager = Mock()
+        processor.tag_manager.get_tags_string.return_value = ""
+        processor.tag_manager.add_tags.return_value = 0
+
+        folders = []
+        for name in ("2024-01-01_author_title", "instagram_ID1_Title"):
+            folder = tmp_path / "downloads" / name
+            folder.mkdir(parents=True)
+            (folder / "description.md").write_text(f"Description {name}")
+            folders.append(folder)
+
+        with patch('module3_analyze.RAGEngine', object), \
+                patch('module3_analyze._get_rag', side_effect=fake_get_rag, create=True):
+            for folder in folders:
+                assert processor.process_folder(folder)['success'] is True
+            processor.close()
+
+        # Обе папки индексируются в одну базу: downloads, а не папка контента
+        assert list(engines) == [str(tmp_path / "downloads")]
+        assert sorted(indexed) == sorted(folders)
+
+    def test_process_all_indexes_user_folders_in_one_batch(self, processor, tmp_path, monkeypatch):
+        monkeypatch.setenv("OLLAMA_NUM_PARALLEL", "1")
+        batches = []
+
+        class FakeRAG:
+            def index_folders(self, folders):
+                batches.append(list(folders))
+                return len(folders)
+
+        engine = FakeRAG()
+        processor.brain = Mock()
+        processor.brain.analyze.return_value = {'summary': 'AI summary', 'tags': [], 'category': 'Test'}
+        processor.tag_manager = Mock()
+        processor.tag_manager.get_tags_string.return_value = ""
+        processor.tag_manager.add_tags.return_value = 0
+
+        names = ("2024-01-01_author_title", "instagram_ID1_Title", "youtube_ID2_Title")
+        for name in names:
+            folder = tmp_path / "downloads" / name
+            folder.mkdir(parents=True)
+            (folder / "description.md").write_text(f"Description {name}")
+
+        get_rag = Mock(return_value=engine)
+        with patch('module3_analyze.RAGEngine', object), \
+                patch('module3_analyze._get_rag', get_rag, create=True):
+            stats = processor.process_all()
+            processor.close()
+
+        assert stats['successfully_processed'] == 3
+        get_rag.assert_called_once_with(str(tmp_path / "downloads"))
+        assert len(batches) == 1
+        assert sorted(f.name for f in batches[0]) == sorted(names)
+
+    def test_failed_prefetch_falls_back_to_sync_analyze(self, processor, tmp_path, monkeypatch):
+        monkeypatch.setenv("OLLAMA_NUM_PARALLEL", "4")
+        processor.brain = Mock()
+        processor.brain.aanalyze = AsyncMock(side_effect=ConnectionError("ollama down"))
+        processor.brain.close_async_client = AsyncMock()
+        processor.brain.analyze.return_value = {'summary': 'AI summary', 'tags': [], 'category': 'Test'}
+        processor.tag_manager = Mock()
+        processor.tag_manager.get_tags_string.return_value = ""
+        processor.tag_manager.add_tags.return_value = 0
+
+        for name in ("instagram_ID1_Title", "youtube_ID2_Title"):
+            folder = tmp_path / "downloads" / name
+            folder.mkdir(parents=True)
+            (folder / "description.md").write_text(f"Description {name}")
+
+        with patch('module3_analyze.RAGEngine', None):
+            stats = processor.process_all()
+
+        assert stats['successfully_processed'] == 2
+        assert processor.brain.analyze.call_count == 2
+        # Клиент создается и закрывается внутри одного asyncio.run
+        processor.brain.create_async_client.assert_called_once()
+        processor.brain.close_async_client.assert_awaited_once()
+
     def test_find_images(self, processor, tmp_path):
         folder = tmp_path / "downloads" / "img_folder"
         folder.mkdir(parents=True)
@@ -85,3 +201,11 @@ class TestAIProcessor:
         
         images = processor.find_images(folder)
         assert len(images) == 2
+
+
+def test_folder_meta_from_name():
+    meta = FolderMeta.from_name("instagram_ABC123_some_reel_title")
+    assert (meta.source, meta.id, meta.title) == ("instagram", "ABC123", "some reel title")
+
+    meta = FolderMeta.from_name("plainfolder")
+    assert (meta.source, meta.id, meta.title) == ("plainfolder", "unknown", "plainfolder")
@@ -1,3 +1,4 @@
+import os
 import sys
 import types
 from pathlib import Path
@@ -110,3 +111,63 @@ def test_index_and_query(monkeypatch, tmp_path):
     assert 'answer' in res
     assert 'sources' in res
     assert 'chunks' in res
+
+
+def test_get_rag_engine_is_shared(monkeypatch, tmp_path):
+    _make_fake_env(monkeypatch)
+
+    from src.modules.module4_rag import get_rag_engine
+
+    user_root = tmp_path / 'user_123'
+    user_root.mkdir()
+    rag = get_rag_engine(str(user_root))
+    assert get_rag_engine(str(user_root)) is rag
+
+    # LocalBrain is created once and reused by later queries
+    rag.query('первый вопрос')
+    brain = rag._brain
+    rag.query('второй вопрос')
+    assert rag._brain is brain
+
+
+def test_get_rag_engine_invalidation_and_eviction(monkeypatch, tmp_path):
+    _make_fake_env(monkeypatch)
+
+    from src.modules import module4_rag
+    from src.modules.module4_rag import get_rag_engine
+
+    user_root = tmp_path / 'downloads'
+    user_root.mkdir()
+    rag = get_rag_engine(str(user_root))
+
+    # user root changed after the engine was loaded -> fresh engine
+    stat = user_root.stat()
+    os.utime(user_root, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    fresh = get_rag_engine(str(user_root))
+    assert fresh is not rag
+    assert get_rag_engine(str(user_root)) is fresh
+
+    # least recently used engines are dropped
+    for i in range(module4_rag.RAG_CACHE_SIZE):
+        other = tmp_path / f'user_{i}' / 'downloads'
+        other.mkdir(parents=True)
+        get_rag_engine(str(other))
+    assert str(user_root) not in module4_rag._engines
+
+
+def test_engines_share_embedder(monkeypatch, tmp_path):
+    _make_fake_env(monkeypatch)
+
+    from src.modules.module4_rag import RAGEngine
+
+    engines = []
+    for name in ('user_1', 'user_2'):
+        root = tmp_path / name
+        folder = root / '2026-01-15_test'
+        folder.mkdir(parents=True)
+        (folder / 'Knowledge.md').write_text('Текст заметки', encoding='utf-8')
+        rag = RAGEngine(user_root=root)
+        rag.index_folder(folder)
+        engines.append(rag)
+
+    assert engines[0]._embedder is engines[1]._embedder
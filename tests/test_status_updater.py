@@ -0,0 +1,40 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("aiogram")
+
+from src.bot.services.status_updater import StatusUpdater
+
+
+class FakeMessage:
+    """Message whose edit_text takes a while, like a real Bot API call"""
+
+    def __init__(self):
+        self.text = "start"
+        self.edits = []
+        self.in_flight = 0
+        self.overlapped = False
+
+    async def edit_text(self, text, **kwargs):
+        self.in_flight += 1
+        self.overlapped |= self.in_flight > 1
+        await asyncio.sleep(0.05)
+        self.edits.append(text)
+        self.in_flight -= 1
+
+
+def test_flush_waits_for_edit_in_flight():
+    async def scenario():
+        message = FakeMessage()
+        status = StatusUpdater(message, min_interval=0.01)
+        await status.set("progress")
+        # Let the delayed edit start, then send the final text
+        await asyncio.sleep(0.03)
+        await status.flush("done")
+        await asyncio.sleep(0.1)
+        return message
+
+    message = asyncio.run(scenario())
+    assert message.edits == ["progress", "done"]
+    assert not message.overlapped
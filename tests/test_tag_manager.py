@@ -119,3 +119,16 @@ class TestTagManager:
         tags = manager.get_all_tags()
         # Теги должны быть нормализованы (lowercase, без пробелов)
         assert any("python" in tag.lower() for tag in tags)
+    
+    def test_tags_string_refreshed_after_add(self, tmp_path):
+        """Тест: строка тегов пересчитывается после добавления новых тегов"""
+        tags_file = tmp_path / "tags.json"
+        manager = TagManager(tags_file)
+        manager.add_tags(["python"])
+        assert manager.get_tags_string() == "python"
+        
+        manager.add_tags(["ai"])
+        assert manager.get_tags_string() == "ai, python"
+        
+        # Перечитывание файла дает тот же результат
+        assert TagManager(tags_file).get_tags_string() == "ai, python"